@@ -5,11 +5,32 @@ Usage: python src/advanced/grid.py BTCUSDT 44000 46000 10 0.01
 """
 
 import argparse
+import math
 import sys
 import os
+import queue
 import time
 import threading
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+# Binance accepts at most 5 new orders / 10 cancels per batch request
+BATCH_PLACE_SIZE = 5
+BATCH_CANCEL_SIZE = 10
+
+# Seconds between status heartbeats while waiting for fills
+HEARTBEAT_SECONDS = 30
+
+# Re-check order status over REST every N heartbeats in case the stream missed a fill
+RECONCILE_EVERY_CYCLES = 10
+
+# Side of the replacement order after a fill, and how far from the level it goes
+OPPOSITE_SIDE = {'BUY': 'SELL', 'SELL': 'BUY'}
+REPLACE_MULTIPLIER = {'BUY': 0.995, 'SELL': 1.005}
+
+# Concurrent REST requests (batches, cancels, status checks)
+REST_WORKERS = 10
 
 # Add parent directory to path to import modules
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -17,11 +38,30 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from config import Config
 from utils import (
     validate_symbol, validate_quantity, validate_price,
-    log_order, handle_api_error, logger, format_number
+    log_order, handle_api_error, logger, format_number, to_json, confirm_action,
+    get_symbol_filters, round_down_to_step
 )
+from price_cache import get_price_cache, PRICE_MAX_AGE
+from user_stream import get_user_stream
+
+@dataclass(slots=True)
+class OrderInfo:
+    """A live grid order, indexed by orderId and by price in ticks"""
+    order_id: int
+    side: str
+    price: float
+    price_ticks: int
+    placed_at: float  # time.monotonic() at placement
 
 class GridTradingBot:
-    def __init__(self, symbol, lower_price, upper_price, grid_levels, quantity_per_grid, dry_run=False):
+    # Console templates for the heartbeat output, written in one call each
+    _CYCLE_TPL = "\n🔍 Cycle {cycle} - Price: {price} - Active Orders: {orders}\n"
+    _STATUS_TPL = ("\n📋 Grid Status:\n"
+                   "Current Price: {price}\n"
+                   "Active Orders: {orders} (BUY: {buys}, SELL: {sells})\n"
+                   "Price Range: {lower} - {upper}\n")
+    
+    def __init__(self, symbol, lower_price, upper_price, grid_levels, quantity_per_grid, dry_run=False, price_ttl=0.5):
         self.symbol = validate_symbol(symbol)
         self.lower_price = validate_price(lower_price)
         self.upper_price = validate_price(upper_price)
@@ -39,45 +79,165 @@ class GridTradingBot:
         
         # Initialize client and state
         self.client = Config.get_client()
-        self.grid_orders = {}  # Track placed orders
+        self.filters = get_symbol_filters(self.client, self.symbol)
+        self.tick_size = self.filters['tickSize']
+        
+        # Round quantity down to the lot step and check exchange minimums
+        step_size = self.filters['stepSize']
+        self.quantity_per_grid = round_down_to_step(self.quantity_per_grid, step_size, self.filters['quantityDecimals'])
+        if self.quantity_per_grid < self.filters['minQty']:
+            raise ValueError(f"Quantity per grid below minimum {self.filters['minQty']} for {self.symbol}")
+        if self.lower_price * self.quantity_per_grid < self.filters['minNotional']:
+            raise ValueError(f"Order value at lower price below minimum notional {self.filters['minNotional']}")
+        
+        self.grid_orders = {}  # price in ticks -> OrderInfo
+        self.orders_by_id = {}  # orderId -> OrderInfo
+        self.buy_count = 0  # Live BUY orders, kept in step with the indices
+        self.sell_count = 0  # Live SELL orders
+        self.filled_order_ids = queue.Queue()  # Fed by the user-data stream
+        self._fill_event = threading.Event()  # Set when fills are queued
+        self._stop_event = threading.Event()  # Set to end run_grid immediately
+        self._pool = ThreadPoolExecutor(max_workers=REST_WORKERS)  # Concurrent REST calls
         self.running = False
+        self.price_ttl = price_ttl  # Seconds a REST ticker price is reused
+        self._rest_price = (None, 0.0)  # (price, time.monotonic() when fetched)
         
         # Calculate grid prices
         self.calculate_grid_levels()
         
+        # Streams are opened by start_streams, so a declined prompt opens no sockets
+        self.price_cache = get_price_cache()
+        self.user_stream = None
+        
     def calculate_grid_levels(self):
         """Calculate buy and sell price levels for the grid"""
         price_range = self.upper_price - self.lower_price
         price_step = price_range / (self.grid_levels - 1)
         
-        self.buy_levels = []
-        self.sell_levels = []
+        # Evenly spaced levels, with the top level pinned to the upper bound
+        levels = [self.lower_price + (i * price_step) for i in range(self.grid_levels - 1)]
+        levels.append(self.upper_price)
+        levels = [self.quantize_price(price) for price in levels]
         
-        for i in range(self.grid_levels):
-            level_price = self.lower_price + (i * price_step)
-            
-            # Buy orders at lower levels, sell orders at higher levels
-            if i < self.grid_levels // 2:
-                self.buy_levels.append(level_price)
-            else:
-                self.sell_levels.append(level_price)
+        # Buy orders at lower levels, sell orders at higher levels
+        mid = self.grid_levels // 2
+        self.buy_levels = levels[:mid]
+        self.sell_levels = levels[mid:]
+        
+        # Replacement targets for every level are fixed, so work them out once
+        self.replacement_prices = {
+            self.to_ticks(price): self.calculate_replacement_prices(price) for price in levels
+        }
+        
+        logger.info("Grid calculated: %d buy levels, %d sell levels", len(self.buy_levels), len(self.sell_levels))
+        
+    def calculate_replacement_prices(self, price):
+        """
+        Calculate where to re-enter after an order at this price fills
+        Args:
+            price (float): Filled order price
+        Returns:
+            dict: Quantized replacement price for each new side
+        """
+        return {
+            # Buy back slightly below the level, sell slightly above, within the grid range
+            'BUY': self.quantize_price(max(price * REPLACE_MULTIPLIER['BUY'], self.lower_price)),
+            'SELL': self.quantize_price(min(price * REPLACE_MULTIPLIER['SELL'], self.upper_price))
+        }
+    
+    def get_replacement_price(self, order_info, new_side):
+        """Look up the replacement price for a filled order, computing it once for off-grid prices"""
+        prices = self.replacement_prices.get(order_info.price_ticks)
+        if prices is None:
+            prices = self.calculate_replacement_prices(order_info.price)
+            self.replacement_prices[order_info.price_ticks] = prices
+        return prices[new_side]
+    
+    def quantize_price(self, price):
+        """Round a price down to the symbol's tick size"""
+        ticks = math.floor(price / self.tick_size + 1e-9)
+        return round(ticks * self.tick_size, self.filters['priceDecimals'])
+    
+    def to_ticks(self, price):
+        """Quantize a price to an integer number of ticks (safe dict key)"""
+        return int(round(price / self.tick_size))
+    
+    def _add_order(self, order_info):
+        """Track a live order in both indices and the side counters"""
+        self.grid_orders[order_info.price_ticks] = order_info
+        self.orders_by_id[order_info.order_id] = order_info
+        
+        if order_info.side == 'BUY':
+            self.buy_count += 1
+        else:
+            self.sell_count += 1
+    
+    def _remove_order(self, order_id):
+        """
+        Stop tracking an order
+        Returns:
+            OrderInfo: The removed order, or None if it is not one of ours
+        """
+        order_info = self.orders_by_id.pop(order_id, None)
+        if order_info is None:
+            return None
         
-        logger.info(f"Grid calculated: {len(self.buy_levels)} buy levels, {len(self.sell_levels)} sell levels")
+        del self.grid_orders[order_info.price_ticks]
+        if order_info.side == 'BUY':
+            self.buy_count -= 1
+        else:
+            self.sell_count -= 1
+        
+        return order_info
+    
+    def start_streams(self):
+        """Subscribe to the bookTicker and (live runs only) user-data streams"""
+        # Stream prices instead of polling the ticker endpoint
+        self.price_cache.subscribe(self.symbol)
         
+        # Listen for fills instead of polling every order
+        if not self.dry_run and self.user_stream is None:
+            self.user_stream = get_user_stream()
+            self.user_stream.add_listener(self._on_user_event)
+    
+    def _on_user_event(self, order):
+        """Queue fills reported by the user-data stream (runs on the websocket thread)"""
+        if order['s'] == self.symbol and order['X'] == 'FILLED':
+            self.filled_order_ids.put(order['i'])
+            self._fill_event.set()
+    
     def get_current_price(self):
-        """Get current market price"""
+        """Get current market price (streamed mid, REST when the stream is cold or stale)"""
+        # A stale mid must not decide BUY/SELL levels if the stream has dropped
+        price = self.price_cache.get_price(self.symbol, PRICE_MAX_AGE)
+        if price is not None:
+            return price
+        
+        # Reuse a recent REST price rather than hitting the ticker again
+        price, fetched_at = self._rest_price
+        if price is not None and time.monotonic() - fetched_at < self.price_ttl:
+            return price
+        
         try:
             ticker = self.client.futures_symbol_ticker(symbol=self.symbol)
-            return float(ticker['price'])
+            price = float(ticker['price'])
+            self._rest_price = (price, time.monotonic())
+            return price
         except Exception as e:
             raise Exception(f"Could not get price for {self.symbol}: {e}")
     
-    def place_grid_order(self, side, price, order_id=None):
-        """Place a single grid order"""
+    def place_grid_order(self, side, price, order_id=None, bulk=False):
+        """
+        Place a single grid order
+        Args:
+            side (str): BUY or SELL
+            price (float): Limit price
+            bulk (bool): Skip the per-order log; the caller logs the whole batch
+        """
         try:
             if self.dry_run:
-                fake_order_id = f"DRY_RUN_GRID_{side}_{len(self.grid_orders)}"
-                logger.info(f"DRY RUN: Would place {side} order at {price}")
+                fake_order_id = f"DRY_RUN_GRID_{side}_{format_number(price)}"
+                logger.info("DRY RUN: Would place %s order at %s", side, price)
                 return {
                     'orderId': fake_order_id,
                     'symbol': self.symbol,
@@ -99,102 +259,206 @@ class GridTradingBot:
             
             order = self.client.futures_create_order(**order_params)
             
-            log_order(f"GRID_{side}_ORDER_PLACED", self.symbol, side, 
-                     self.quantity_per_grid, price, order_id=order['orderId'])
+            if not bulk:
+                log_order(f"GRID_{side}_ORDER_PLACED", self.symbol, side, 
+                         self.quantity_per_grid, price, order_id=order['orderId'])
             
             return order
             
         except Exception as e:
             error_msg = handle_api_error(e, f"GRID_{side}_ORDER")
-            logger.error(f"Failed to place grid order: {error_msg}")
+            logger.error("Failed to place grid order: %s", error_msg)
             return None
     
+    def place_grid_orders(self, levels):
+        """
+        Place several grid orders using batchOrders (5 orders per request)
+        Orders are not logged one by one; the caller logs the whole placement.
+        Args:
+            levels (list): (side, price) tuples to place
+        Returns:
+            list: (side, price, order) tuples for the accepted orders
+        """
+        if self.dry_run:
+            return [(side, price, self.place_grid_order(side, price, bulk=True)) for side, price in levels]
+        
+        chunks = [levels[start:start + BATCH_PLACE_SIZE]
+                  for start in range(0, len(levels), BATCH_PLACE_SIZE)]
+        
+        # Batches are independent, so send them concurrently
+        placed = []
+        for batch_placed in self._pool.map(self._place_batch, chunks):
+            placed.extend(batch_placed)
+        
+        return placed
+    
+    def _place_batch(self, chunk):
+        """Send one batchOrders request and return (side, price, order) for accepted orders"""
+        batch = [{
+            'symbol': self.symbol,
+            'side': side,
+            'type': 'LIMIT',
+            'quantity': str(self.quantity_per_grid),
+            'price': str(price),
+            'timeInForce': 'GTC'
+        } for side, price in chunk]
+        
+        try:
+            response = self.client.futures_place_batch_order(
+                batchOrders=to_json(batch)
+            )
+        except Exception as e:
+            error_msg = handle_api_error(e, "GRID_BATCH_ORDER")
+            logger.error("Failed to place grid order batch: %s", error_msg)
+            return []
+        
+        placed = []
+        
+        # Results come back in request order; rejected entries carry code/msg
+        for (side, price), order in zip(chunk, response):
+            if 'orderId' not in order:
+                logger.error("Grid %s order at %s rejected: %s", side, price, order.get('msg'))
+                continue
+            
+            placed.append((side, price, order))
+        
+        return placed
+    
+    def cancel_orders(self, order_ids):
+        """
+        Cancel several orders using batch cancels (10 orders per request)
+        Args:
+            order_ids (list): Order IDs to cancel
+        Returns:
+            int: Number of orders cancelled
+        """
+        if self.dry_run:
+            return sum(1 for order_id in order_ids if self.cancel_order(order_id))
+        
+        chunks = [order_ids[start:start + BATCH_CANCEL_SIZE]
+                  for start in range(0, len(order_ids), BATCH_CANCEL_SIZE)]
+        
+        return sum(self._pool.map(self._cancel_batch, chunks))
+    
+    def _cancel_batch(self, chunk):
+        """Send one batch cancel request and return how many orders were cancelled"""
+        try:
+            response = self.client.futures_cancel_orders(
+                symbol=self.symbol,
+                orderIdList=to_json(chunk)
+            )
+        except Exception as e:
+            logger.error("Failed to cancel orders %s: %s", chunk, e)
+            return 0
+        
+        cancelled = []
+        
+        for order_id, result in zip(chunk, response):
+            if 'orderId' in result:
+                cancelled.append(order_id)
+            else:
+                logger.error("Failed to cancel order %s: %s", order_id, result.get('msg'))
+        
+        # One record per batch rather than one per order
+        if cancelled:
+            logger.info("Cancelled orders %s", cancelled)
+        
+        return len(cancelled)
+    
     def cancel_order(self, order_id):
         """Cancel a specific order"""
         try:
             if self.dry_run:
-                logger.info(f"DRY RUN: Would cancel order {order_id}")
+                logger.info("DRY RUN: Would cancel order %s", order_id)
                 return True
             
             self.client.futures_cancel_order(symbol=self.symbol, orderId=order_id)
-            logger.info(f"Cancelled order {order_id}")
+            logger.info("Cancelled order %s", order_id)
             return True
             
         except Exception as e:
-            logger.error(f"Failed to cancel order {order_id}: {e}")
+            logger.error("Failed to cancel order %s: %s", order_id, e)
             return False
     
+    def reconcile_fills(self):
+        """Query all tracked orders over REST in parallel and queue any fills the stream missed"""
+        futures = {
+            self._pool.submit(self.client.futures_get_order, symbol=self.symbol, orderId=order_id): order_id
+            for order_id in self.orders_by_id  # Only mutated on this thread
+        }
+        
+        missed = 0
+        for future in as_completed(futures):
+            order_id = futures[future]
+            try:
+                order_status = future.result()
+            except Exception as e:
+                logger.error("Error checking order %s: %s", order_id, e)
+                continue
+            
+            if order_status['status'] == 'FILLED':
+                self.filled_order_ids.put(order_id)
+                missed += 1
+        
+        if missed:
+            logger.warning("REST check found %d fills not seen on the user-data stream", missed)
+            self._fill_event.set()
+    
     def check_and_replace_orders(self):
-        """Check filled orders and replace them with opposite side orders"""
+        """Replace orders reported filled by the user-data stream with opposite side orders"""
         try:
-            current_price = self.get_current_price()
             orders_to_replace = []
             
-            for level_price, order_info in list(self.grid_orders.items()):
-                if self.dry_run:
-                    continue  # Skip order checking in dry run
+            # Drain fills pushed by the websocket since the last cycle
+            while True:
+                try:
+                    order_id = self.filled_order_ids.get_nowait()
+                except queue.Empty:
+                    break
                 
-                order_id = order_info['order_id']
-                side = order_info['side']
+                order_info = self._remove_order(order_id)
+                if order_info is None:
+                    continue  # Not one of our grid orders
                 
-                try:
-                    # Check order status
-                    order_status = self.client.futures_get_order(
-                        symbol=self.symbol, 
-                        orderId=order_id
-                    )
-                    
-                    # If order is filled, mark for replacement
-                    if order_status['status'] == 'FILLED':
-                        logger.info(f"Grid order filled: {side} at {level_price}")
-                        orders_to_replace.append((level_price, order_info))
-                        
-                        # Log the fill
-                        log_order(f"GRID_{side}_ORDER_FILLED", self.symbol, side,
-                                 self.quantity_per_grid, level_price, order_id=order_id)
-                        
-                except Exception as e:
-                    logger.error(f"Error checking order {order_id}: {e}")
+                level_price = order_info.price
+                side = order_info.side
+                logger.info("Grid order filled: %s at %s", side, level_price)
+                orders_to_replace.append((level_price, order_info))
+                
+                # Log the fill
+                log_order(f"GRID_{side}_ORDER_FILLED", self.symbol, side,
+                         self.quantity_per_grid, level_price, order_id=order_id)
             
             # Replace filled orders with opposite side
             for level_price, old_order_info in orders_to_replace:
-                del self.grid_orders[level_price]
-                
                 # Place opposite order
-                old_side = old_order_info['side']
-                new_side = 'SELL' if old_side == 'BUY' else 'BUY'
+                old_side = old_order_info.side
+                new_side = OPPOSITE_SIDE[old_side]
                 
-                # Calculate new price level
-                if new_side == 'BUY':
-                    # Place buy order slightly below current level
-                    new_price = level_price * 0.995
-                    if new_price < self.lower_price:
-                        new_price = self.lower_price
-                else:
-                    # Place sell order slightly above current level
-                    new_price = level_price * 1.005
-                    if new_price > self.upper_price:
-                        new_price = self.upper_price
+                new_price = self.get_replacement_price(old_order_info, new_side)
+                
+                # Never stack two orders on the same tick
+                new_ticks = self.to_ticks(new_price)
+                if new_ticks in self.grid_orders:
+                    logger.warning("Skipping %s replacement at %s: level already has an order", new_side, new_price)
+                    continue
                 
                 # Place the replacement order
                 new_order = self.place_grid_order(new_side, new_price)
                 if new_order:
-                    self.grid_orders[new_price] = {
-                        'order_id': new_order['orderId'],
-                        'side': new_side,
-                        'price': new_price,
-                        'placed_at': datetime.now()
-                    }
+                    self._add_order(OrderInfo(new_order['orderId'], new_side, new_price,
+                                              new_ticks, time.monotonic()))
                     
                     print(f"🔄 Replaced {old_side} order at {format_number(level_price)} "
                           f"with {new_side} order at {format_number(new_price)}")
                           
         except Exception as e:
-            logger.error(f"Error in check_and_replace_orders: {e}")
+            logger.error("Error in check_and_replace_orders: %s", e)
     
     def initialize_grid(self):
         """Place initial grid orders"""
         try:
+            self.start_streams()
             current_price = self.get_current_price()
             
             print(f"\n📊 Initializing Grid Trading Bot")
@@ -205,34 +469,30 @@ class GridTradingBot:
             print(f"Quantity per Level: {format_number(self.quantity_per_grid)}")
             print(f"Dry Run: {self.dry_run}")
             
-            # Place buy orders at levels below current price
-            for price in self.buy_levels:
-                if price < current_price:
-                    order = self.place_grid_order('BUY', price)
-                    if order:
-                        self.grid_orders[price] = {
-                            'order_id': order['orderId'],
-                            'side': 'BUY',
-                            'price': price,
-                            'placed_at': datetime.now()
-                        }
-                        print(f"📈 Placed BUY order at {format_number(price)}")
+            # Buy orders at levels below current price, sell orders above
+            levels = [('BUY', price) for price in self.buy_levels if price < current_price]
+            levels += [('SELL', price) for price in self.sell_levels if price > current_price]
             
-            # Place sell orders at levels above current price
-            for price in self.sell_levels:
-                if price > current_price:
-                    order = self.place_grid_order('SELL', price)
-                    if order:
-                        self.grid_orders[price] = {
-                            'order_id': order['orderId'],
-                            'side': 'SELL',
-                            'price': price,
-                            'placed_at': datetime.now()
-                        }
-                        print(f"📉 Placed SELL order at {format_number(price)}")
+            placements = []
+            for side, price, order in self.place_grid_orders(levels):
+                if not order:
+                    continue
+                
+                placements.append({'side': side, 'price': price, 'id': order['orderId']})
+                self._add_order(OrderInfo(order['orderId'], side, price,
+                                          self.to_ticks(price), time.monotonic()))
+                
+                if side == 'BUY':
+                    print(f"📈 Placed BUY order at {format_number(price)}")
+                else:
+                    print(f"📉 Placed SELL order at {format_number(price)}")
             
             print(f"\n✅ Grid initialized with {len(self.grid_orders)} orders")
             
+            # One structured record for the whole placement
+            log_order("GRID_BATCH_PLACED", self.symbol, "BOTH",
+                     len(placements) * self.quantity_per_grid, to_json(placements))
+            
             # Log grid initialization
             log_order("GRID_INITIALIZED", self.symbol, "BOTH", 
                      len(self.grid_orders) * self.quantity_per_grid,
@@ -252,34 +512,48 @@ class GridTradingBot:
                 return False
             
             self.running = True
+            self._stop_event.clear()
             start_time = datetime.now()
             end_time = start_time + timedelta(minutes=duration_minutes)
+            deadline = time.monotonic() + duration_minutes * 60
             
             print(f"\n🚀 Grid trading started at {start_time.strftime('%Y-%m-%d %H:%M:%S')}")
             print(f"Will run until {end_time.strftime('%Y-%m-%d %H:%M:%S')} (Ctrl+C to stop early)")
             
             cycle_count = 0
             
-            while self.running and datetime.now() < end_time:
+            while not self._stop_event.is_set():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                
+                # Sleep until a fill arrives, the heartbeat is due, or we are stopped
+                if self._fill_event.wait(timeout=min(HEARTBEAT_SECONDS, remaining)):
+                    self._fill_event.clear()
+                    if not self._stop_event.is_set():
+                        self.check_and_replace_orders()
+                    continue
+                
+                # Heartbeat
                 cycle_count += 1
                 current_price = self.get_current_price()
                 
-                print(f"\n🔍 Cycle {cycle_count} - Price: {format_number(current_price)} "
-                      f"- Active Orders: {len(self.grid_orders)}")
-                
-                # Check and replace filled orders
-                if not self.dry_run:
-                    self.check_and_replace_orders()
+                sys.stdout.write(self._CYCLE_TPL.format(
+                    cycle=cycle_count, price=format_number(current_price), orders=len(self.grid_orders)
+                ))
+                sys.stdout.flush()
                 
                 # Display grid status
                 if cycle_count % 10 == 0:  # Every 10 cycles
-                    self.display_grid_status()
+                    self.display_grid_status(current_price)
                 
-                # Wait before next cycle
-                time.sleep(30)  # Check every 30 seconds
+                # Safety net for fills lost during a websocket reconnect
+                if not self.dry_run and cycle_count % RECONCILE_EVERY_CYCLES == 0:
+                    self.reconcile_fills()
             
             print(f"\n🏁 Grid trading completed after {cycle_count} cycles")
-            self.stop_grid()
+            if not self._stop_event.is_set():  # Otherwise whoever stopped us already cleaned up
+                self.stop_grid()
             
             return True
             
@@ -293,36 +567,51 @@ class GridTradingBot:
             self.stop_grid()
             return False
     
-    def display_grid_status(self):
-        """Display current grid status"""
+    def display_grid_status(self, current_price=None):
+        """
+        Display current grid status
+        Args:
+            current_price (float, optional): Price already fetched this cycle
+        """
         try:
-            current_price = self.get_current_price()
-            buy_orders = sum(1 for info in self.grid_orders.values() if info['side'] == 'BUY')
-            sell_orders = sum(1 for info in self.grid_orders.values() if info['side'] == 'SELL')
+            if current_price is None:
+                current_price = self.get_current_price()
             
-            print(f"\n📋 Grid Status:")
-            print(f"Current Price: {format_number(current_price)}")
-            print(f"Active Orders: {len(self.grid_orders)} (BUY: {buy_orders}, SELL: {sell_orders})")
-            print(f"Price Range: {format_number(self.lower_price)} - {format_number(self.upper_price)}")
+            parts = [self._STATUS_TPL.format(
+                price=format_number(current_price),
+                orders=len(self.grid_orders),
+                buys=self.buy_count,
+                sells=self.sell_count,
+                lower=format_number(self.lower_price),
+                upper=format_number(self.upper_price)
+            )]
             
             if current_price < self.lower_price:
-                print(f"⚠️  Price below grid range!")
+                parts.append("⚠️  Price below grid range!\n")
             elif current_price > self.upper_price:
-                print(f"⚠️  Price above grid range!")
+                parts.append("⚠️  Price above grid range!\n")
+            
+            sys.stdout.write(''.join(parts))
+            sys.stdout.flush()
                 
         except Exception as e:
-            logger.error(f"Error displaying grid status: {e}")
+            logger.error("Error displaying grid status: %s", e)
     
     def stop_grid(self):
         """Stop grid trading and cancel all orders"""
         self.running = False
         
-        print(f"\n🛑 Stopping grid trading...")
-        cancelled_count = 0
+        # Wake run_grid so it exits without waiting for the next heartbeat
+        self._stop_event.set()
+        self._fill_event.set()
         
-        for level_price, order_info in list(self.grid_orders.items()):
-            if self.cancel_order(order_info['order_id']):
-                cancelled_count += 1
+        if self.user_stream:
+            self.user_stream.remove_listener(self._on_user_event)
+        
+        print(f"\n🛑 Stopping grid trading...")
+        order_ids = list(self.orders_by_id)
+        cancelled_count = self.cancel_orders(order_ids)
+        self._pool.shutdown(wait=False)
         
         print(f"✅ Cancelled {cancelled_count} orders")
         
@@ -330,6 +619,26 @@ class GridTradingBot:
         log_order("GRID_STOPPED", self.symbol, "BOTH", 0, 
                  f"Cancelled:{cancelled_count}")
 
+def _positive_price(value):
+    """argparse type: a price greater than zero"""
+    try:
+        price = float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid price: {value}")
+    if price <= 0:
+        raise argparse.ArgumentTypeError(f"price must be positive, got {value}")
+    return price
+
+def _grid_levels(value):
+    """argparse type: a grid level count between 2 and 50"""
+    try:
+        levels = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid level count: {value}")
+    if not 2 <= levels <= 50:
+        raise argparse.ArgumentTypeError(f"grid levels must be between 2 and 50, got {levels}")
+    return levels
+
 def main():
     """Main function for CLI interface"""
     parser = argparse.ArgumentParser(
@@ -355,9 +664,9 @@ Strategy Notes:
     )
     
     parser.add_argument('symbol', help='Trading symbol (e.g., BTCUSDT)')
-    parser.add_argument('lower_price', type=float, help='Lower bound of grid range')
-    parser.add_argument('upper_price', type=float, help='Upper bound of grid range')
-    parser.add_argument('grid_levels', type=int, help='Number of grid levels (2-50)')
+    parser.add_argument('lower_price', type=_positive_price, help='Lower bound of grid range')
+    parser.add_argument('upper_price', type=_positive_price, help='Upper bound of grid range')
+    parser.add_argument('grid_levels', type=_grid_levels, help='Number of grid levels (2-50)')
     parser.add_argument('quantity', type=float, help='Quantity per grid level')
     parser.add_argument('--duration', type=int, default=60,
                        help='Duration to run in minutes (default: 60)')
@@ -365,6 +674,8 @@ Strategy Notes:
                        help='Test strategy without placing real orders')
     
     args = parser.parse_args()
+    if args.lower_price >= args.upper_price:
+        parser.error("lower_price must be less than upper_price")
     
     print(f"\n=== Binance Futures Grid Trading Bot ===")
     print(f"Symbol: {args.symbol}")
@@ -391,8 +702,7 @@ Strategy Notes:
         if not args.dry_run:
             total_quantity = args.grid_levels * args.quantity
             print(f"⚠️  This will use approximately {format_number(total_quantity)} {args.symbol[:-4]} in total")
-            response = input("   Continue? (y/N): ")
-            if response.lower() not in ['y', 'yes']:
+            if not confirm_action("   Continue?"):
                 print("Grid strategy cancelled by user")
                 sys.exit(0)
         
@@ -410,5 +720,4 @@ Strategy Notes:
         sys.exit(1)
 
 if __name__ == "__main__":
-    from datetime import timedelta
     main()
\ No newline at end of file
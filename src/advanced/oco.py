@@ -5,10 +5,11 @@ Usage: python src/advanced/oco.py BTCUSDT SELL 0.01 46000 44000
 """
 
 import argparse
+import asyncio
 import sys
 import os
 import time
-import threading
+from concurrent.futures import TimeoutError as FutureTimeoutError
 from datetime import datetime
 
 # Add parent directory to path to import modules
@@ -19,14 +20,20 @@ from utils import (
     validate_symbol, validate_quantity, validate_side, validate_price,
     log_order, handle_api_error, logger, format_number
 )
+from runtime import submit
+from user_stream import get_user_stream
+from price_cache import get_current_price
+import ws_trade
 
-def get_current_price(client, symbol):
-    """Get current market price for a symbol"""
-    try:
-        ticker = client.futures_symbol_ticker(symbol=symbol)
-        return float(ticker['price'])
-    except Exception as e:
-        raise Exception(f"Could not get price for {symbol}: {e}")
+# Seconds between REST status checks while waiting for stream events: frequent
+# right after placement, when fills are most likely, then once a minute
+STATUS_CHECK_DELAYS = (1, 2, 5, 10, 30, 60)
+
+# Statuses that end an OCO without a fill on that leg
+CLOSED_STATUSES = frozenset({'CANCELED', 'EXPIRED'})
+
+# Direction of the take profit from the current price for each closing side
+PRICE_SIGN = {'SELL': 1, 'BUY': -1}
 
 def validate_oco_prices(current_price, take_profit_price, stop_loss_price, side):
     """
@@ -39,30 +46,59 @@ def validate_oco_prices(current_price, take_profit_price, stop_loss_price, side)
     Returns:
         bool: True if prices are valid
     """
-    if side == 'SELL':  # Closing a long position
-        # Take profit should be above current price
-        # Stop loss should be below current price
-        if take_profit_price <= current_price:
-            logger.error(f"Take profit {take_profit_price} should be above current price {current_price}")
-            return False
-        if stop_loss_price >= current_price:
-            logger.error(f"Stop loss {stop_loss_price} should be below current price {current_price}")
-            return False
-    else:  # BUY - Closing a short position
-        # Take profit should be below current price
-        # Stop loss should be above current price
-        if take_profit_price >= current_price:
-            logger.error(f"Take profit {take_profit_price} should be below current price {current_price}")
-            return False
-        if stop_loss_price <= current_price:
-            logger.error(f"Stop loss {stop_loss_price} should be above current price {current_price}")
-            return False
+    # SELL closes a long: take profit above the price, stop loss below.
+    # BUY closes a short: the mirror image, so flip the sign of both checks.
+    sign = PRICE_SIGN[side]
+    above, below = ('above', 'below') if sign > 0 else ('below', 'above')
+    
+    if sign * (take_profit_price - current_price) <= 0:
+        logger.error("Take profit %s should be %s current price %s", take_profit_price, above, current_price)
+        return False
+    if sign * (current_price - stop_loss_price) <= 0:
+        logger.error("Stop loss %s should be %s current price %s", stop_loss_price, below, current_price)
+        return False
     
     return True
 
-def monitor_orders(client, symbol, tp_order_id, sl_order_id, monitoring_duration=3600):
+def place_order_pair(client, tp_order_params, sl_order_params):
+    """
+    Send the take profit and stop loss orders together
+    Both legs go out in one round trip (pipelined WebSocket requests, or a
+    single REST batchOrders call). If one leg is rejected the other is
+    cancelled, so a half OCO is never left open.
+    Args:
+        client: Binance client
+        tp_order_params (dict): Take profit order parameters
+        sl_order_params (dict): Stop loss order parameters
+    Returns:
+        tuple: (tp_order, sl_order) responses
+    Raises:
+        Exception: The error of the rejected leg
+    """
+    legs = ws_trade.create_orders(client, [tp_order_params, sl_order_params])
+    errors = [leg for leg in legs if isinstance(leg, Exception)]
+    
+    if errors:
+        # Roll back whichever leg did go through
+        for order in legs:
+            if isinstance(order, Exception):
+                continue
+            try:
+                ws_trade.cancel_order(client, symbol=order['symbol'], orderId=order['orderId'])
+                logger.warning("Cancelled order %s because the other OCO leg failed", order['orderId'])
+            except Exception as e:
+                logger.error("Could not cancel order %s after OCO leg failure: %s", order['orderId'], e)
+        raise errors[0]
+    
+    tp_order, sl_order = legs
+    return tp_order, sl_order
+
+async def monitor_orders(client, symbol, tp_order_id, sl_order_id, monitoring_duration=3600):
     """
     Monitor OCO orders and cancel the other when one executes
+    Runs on the shared background loop; order updates are pushed by the
+    user-data stream, so a fill is acted on as soon as Binance reports it.
+    REST status checks on the STATUS_CHECK_DELAYS schedule cover a stream outage.
     Args:
         client: Binance client
         symbol (str): Trading symbol
@@ -70,53 +106,91 @@ def monitor_orders(client, symbol, tp_order_id, sl_order_id, monitoring_duration
         sl_order_id (str): Stop loss order ID
         monitoring_duration (int): How long to monitor in seconds
     """
-    start_time = time.time()
-    logger.info(f"Starting OCO order monitoring for {monitoring_duration} seconds")
+    logger.info("Starting OCO order monitoring for %s seconds", monitoring_duration)
+    
+    loop = asyncio.get_running_loop()
+    updates = asyncio.Queue()  # (orderId, status) from the websocket thread
+    
+    def on_order_update(order):
+        loop.call_soon_threadsafe(updates.put_nowait, (order['i'], order['X']))
+    
+    async def check_status():
+        # One open-orders query covers both legs while they are still working
+        open_orders = await asyncio.to_thread(client.futures_get_open_orders, symbol=symbol)
+        open_ids = {order['orderId'] for order in open_orders}
+        
+        for order_id in (tp_order_id, sl_order_id):
+            if order_id in open_ids:
+                continue
+            # Gone from the book: find out whether it filled or was cancelled
+            order_status = await asyncio.to_thread(client.futures_get_order, symbol=symbol, orderId=order_id)
+            updates.put_nowait((order_id, order_status['status']))
+    
+    # Only events for our two orders are routed here
+    user_stream = get_user_stream()
+    user_stream.watch_order(tp_order_id, on_order_update)
+    user_stream.watch_order(sl_order_id, on_order_update)
+    deadline = time.monotonic() + monitoring_duration
+    checks = 0
     
     try:
-        while time.time() - start_time < monitoring_duration:
-            # Check take profit order status
-            tp_status = client.futures_get_order(symbol=symbol, orderId=tp_order_id)
-            sl_status = client.futures_get_order(symbol=symbol, orderId=sl_order_id)
+        # Catch anything that happened before the listener was registered
+        await check_status()
+        
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            
+            delay = STATUS_CHECK_DELAYS[min(checks, len(STATUS_CHECK_DELAYS) - 1)]
+            try:
+                order_id, status = await asyncio.wait_for(updates.get(), min(delay, remaining))
+            except asyncio.TimeoutError:
+                # Quiet stream: confirm over REST in case an update was lost in a reconnect
+                if delay < remaining:
+                    checks += 1
+                    await check_status()
+                continue
             
             # If take profit is filled, cancel stop loss
-            if tp_status['status'] == 'FILLED':
-                logger.info(f"Take profit order {tp_order_id} filled, cancelling stop loss {sl_order_id}")
+            if status == 'FILLED' and order_id == tp_order_id:
+                logger.info("Take profit order %s filled, cancelling stop loss %s", tp_order_id, sl_order_id)
                 try:
-                    client.futures_cancel_order(symbol=symbol, orderId=sl_order_id)
+                    await asyncio.to_thread(ws_trade.cancel_order, client, symbol=symbol, orderId=sl_order_id)
                     log_order("OCO_TAKE_PROFIT_EXECUTED", symbol, "CANCEL", 0, 
                              order_id=f"TP:{tp_order_id},SL_CANCELLED:{sl_order_id}")
                     print(f"✓ Take profit executed! Stop loss cancelled.")
-                except:
-                    logger.warning(f"Could not cancel stop loss order {sl_order_id} - may already be cancelled")
+                except Exception:  # Not CancelledError: stopping the monitor must still work
+                    logger.warning("Could not cancel stop loss order %s - may already be cancelled", sl_order_id)
                 break
             
             # If stop loss is filled, cancel take profit
-            if sl_status['status'] == 'FILLED':
-                logger.info(f"Stop loss order {sl_order_id} filled, cancelling take profit {tp_order_id}")
+            if status == 'FILLED' and order_id == sl_order_id:
+                logger.info("Stop loss order %s filled, cancelling take profit %s", sl_order_id, tp_order_id)
                 try:
-                    client.futures_cancel_order(symbol=symbol, orderId=tp_order_id)
+                    await asyncio.to_thread(ws_trade.cancel_order, client, symbol=symbol, orderId=tp_order_id)
                     log_order("OCO_STOP_LOSS_EXECUTED", symbol, "CANCEL", 0,
                              order_id=f"SL:{sl_order_id},TP_CANCELLED:{tp_order_id}")
                     print(f"✓ Stop loss executed! Take profit cancelled.")
-                except:
-                    logger.warning(f"Could not cancel take profit order {tp_order_id} - may already be cancelled")
+                except Exception:
+                    logger.warning("Could not cancel take profit order %s - may already be cancelled", tp_order_id)
                 break
             
             # Check if either order was cancelled externally
-            if tp_status['status'] in ['CANCELED', 'EXPIRED'] or sl_status['status'] in ['CANCELED', 'EXPIRED']:
-                logger.info(f"One or both OCO orders were cancelled externally")
+            if status in CLOSED_STATUSES:
+                logger.info("One or both OCO orders were cancelled externally")
                 break
-            
-            # Sleep before next check
-            time.sleep(10)
         
         logger.info("OCO monitoring completed")
         
     except Exception as e:
-        logger.error(f"Error during OCO monitoring: {e}")
+        logger.error("Error during OCO monitoring: %s", e)
+    finally:
+        user_stream.unwatch_order(tp_order_id)
+        user_stream.unwatch_order(sl_order_id)
 
-def place_oco_order(symbol, side, quantity, take_profit_price, stop_loss_price, dry_run=False):
+def place_oco_order(symbol, side, quantity, take_profit_price, stop_loss_price, dry_run=False,
+                    monitoring_duration=3600):
     """
     Place OCO (One-Cancels-Other) orders
     Args:
@@ -126,6 +200,7 @@ def place_oco_order(symbol, side, quantity, take_profit_price, stop_loss_price,
         take_profit_price (float): Take profit target price
         stop_loss_price (float): Stop loss price
         dry_run (bool): If True, don't actually place orders
+        monitoring_duration (int): How long to monitor the orders in seconds
     Returns:
         dict: Order response or None if failed
     """
@@ -142,7 +217,7 @@ def place_oco_order(symbol, side, quantity, take_profit_price, stop_loss_price,
         
         # Get current market price
         current_price = get_current_price(client, symbol)
-        logger.info(f"Current price for {symbol}: {current_price}")
+        logger.info("Current price for %s: %s", symbol, current_price)
         
         # Validate price relationships
         if not validate_oco_prices(current_price, take_profit_price, stop_loss_price, side):
@@ -172,32 +247,20 @@ def place_oco_order(symbol, side, quantity, take_profit_price, stop_loss_price,
             'timeInForce': 'GTC'
         }
         
-        logger.info(f"Placing take profit order: {tp_order_params}")
-        tp_order = client.futures_create_order(**tp_order_params)
+        # Stop loss closes the position at market once the stop price trades (same for both sides)
+        sl_order_params = {
+            'symbol': symbol,
+            'side': side,
+            'type': 'STOP_MARKET',
+            'quantity': quantity,
+            'stopPrice': stop_loss_price
+        }
         
-        # Place stop loss order
-        # Determine stop loss order type based on side
-        if side == 'SELL':
-            # For closing long position, use STOP_MARKET
-            sl_order_params = {
-                'symbol': symbol,
-                'side': side,
-                'type': 'STOP_MARKET',
-                'quantity': quantity,
-                'stopPrice': stop_loss_price
-            }
-        else:
-            # For closing short position, use STOP_MARKET
-            sl_order_params = {
-                'symbol': symbol,
-                'side': side,
-                'type': 'STOP_MARKET',
-                'quantity': quantity,
-                'stopPrice': stop_loss_price
-            }
+        logger.debug("Placing take profit order: %s", tp_order_params)
+        logger.debug("Placing stop loss order: %s", sl_order_params)
         
-        logger.info(f"Placing stop loss order: {sl_order_params}")
-        sl_order = client.futures_create_order(**sl_order_params)
+        # Both legs go out together instead of one round trip after the other
+        tp_order, sl_order = place_order_pair(client, tp_order_params, sl_order_params)
         
         # Log successful orders
         log_order(
@@ -211,39 +274,42 @@ def place_oco_order(symbol, side, quantity, take_profit_price, stop_loss_price,
         )
         
         # Display results
-        print(f"\n✓ OCO orders placed successfully!")
-        print(f"Take Profit Order ID: {tp_order['orderId']}")
-        print(f"Stop Loss Order ID: {sl_order['orderId']}")
-        print(f"Symbol: {symbol}")
-        print(f"Side: {side}")
-        print(f"Quantity: {format_number(quantity)}")
-        print(f"Take Profit Price: {format_number(take_profit_price)}")
-        print(f"Stop Loss Price: {format_number(stop_loss_price)}")
-        print(f"Current Market Price: {format_number(current_price)}")
-        print(f"Timestamp: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+        lines = []
+        lines.append(f"\n✓ OCO orders placed successfully!")
+        lines.append(f"Take Profit Order ID: {tp_order['orderId']}")
+        lines.append(f"Stop Loss Order ID: {sl_order['orderId']}")
+        lines.append(f"Symbol: {symbol}")
+        lines.append(f"Side: {side}")
+        lines.append(f"Quantity: {format_number(quantity)}")
+        lines.append(f"Take Profit Price: {format_number(take_profit_price)}")
+        lines.append(f"Stop Loss Price: {format_number(stop_loss_price)}")
+        lines.append(f"Current Market Price: {format_number(current_price)}")
+        lines.append(f"Timestamp: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
         
         # Explain the strategy
         if side == 'SELL':
             profit_pct = ((take_profit_price - current_price) / current_price) * 100
             loss_pct = ((current_price - stop_loss_price) / current_price) * 100
-            print(f"\nStrategy (Closing Long Position):")
-            print(f"- Profit Target: +{profit_pct:.2f}% if price reaches {take_profit_price}")
-            print(f"- Risk Management: -{loss_pct:.2f}% if price falls to {stop_loss_price}")
+            lines.append(f"\nStrategy (Closing Long Position):")
+            lines.append(f"- Profit Target: +{profit_pct:.2f}% if price reaches {take_profit_price}")
+            lines.append(f"- Risk Management: -{loss_pct:.2f}% if price falls to {stop_loss_price}")
         else:
             profit_pct = ((current_price - take_profit_price) / current_price) * 100
             loss_pct = ((stop_loss_price - current_price) / current_price) * 100
-            print(f"\nStrategy (Closing Short Position):")
-            print(f"- Profit Target: +{profit_pct:.2f}% if price falls to {take_profit_price}")
-            print(f"- Risk Management: -{loss_pct:.2f}% if price rises to {stop_loss_price}")
+            lines.append(f"\nStrategy (Closing Short Position):")
+            lines.append(f"- Profit Target: +{profit_pct:.2f}% if price falls to {take_profit_price}")
+            lines.append(f"- Risk Management: -{loss_pct:.2f}% if price rises to {stop_loss_price}")
         
-        # Start monitoring in a separate thread
-        print(f"\n🔍 Starting OCO order monitoring...")
-        monitor_thread = threading.Thread(
-            target=monitor_orders,
-            args=(client, symbol, tp_order['orderId'], sl_order['orderId']),
-            daemon=True
-        )
-        monitor_thread.start()
+        lines.append(f"\n🔍 Starting OCO order monitoring...")
+        
+        # One write so concurrent orders don't interleave their output
+        sys.stdout.write('\n'.join(lines) + '\n')
+        sys.stdout.flush()
+        
+        # Monitor on the shared background loop
+        monitor = submit(monitor_orders(
+            client, symbol, tp_order['orderId'], sl_order['orderId'], monitoring_duration
+        ))
         
         return {
             'take_profit': tp_order,
@@ -251,7 +317,7 @@ def place_oco_order(symbol, side, quantity, take_profit_price, stop_loss_price,
             'symbol': symbol,
             'side': side,
             'quantity': quantity,
-            'monitor_thread': monitor_thread
+            'monitor': monitor
         }
         
     except Exception as e:
@@ -261,8 +327,8 @@ def place_oco_order(symbol, side, quantity, take_profit_price, stop_loss_price,
         print(f"\n✗ Error: {error_msg}")
         return None
 
-def main():
-    """Main function for CLI interface"""
+def _build_parser():
+    """Build the OCO command line parser (only needed when run as a script)"""
     parser = argparse.ArgumentParser(
         description='Binance Futures OCO (One-Cancels-Other) Order Bot',
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -293,6 +359,11 @@ Note:
     parser.add_argument('--monitor-time', type=int, default=3600,
                        help='How long to monitor orders in seconds (default: 3600)')
     
+    return parser
+
+def main():
+    """Main function for CLI interface"""
+    parser = _build_parser()
     args = parser.parse_args()
     
     print(f"\n=== Binance Futures OCO Order Bot ===")
@@ -313,18 +384,21 @@ Note:
         args.quantity, 
         args.take_profit, 
         args.stop_loss,
-        args.dry_run
+        args.dry_run,
+        args.monitor_time
     )
     
     if result is None:
         print("\nOCO orders failed. Check the logs for details.")
         sys.exit(1)
     
-    if not args.dry_run and 'monitor_thread' in result:
+    if not args.dry_run and 'monitor' in result:
         print(f"\nOCO orders are being monitored. Press Ctrl+C to stop monitoring.")
         try:
             # Wait for monitoring to complete or user interruption
-            result['monitor_thread'].join(args.monitor_time)
+            result['monitor'].result(timeout=args.monitor_time)
+        except FutureTimeoutError:
+            pass
         except KeyboardInterrupt:
             print(f"\n\nMonitoring stopped by user.")
     
@@ -17,14 +17,11 @@ from utils import (
     validate_symbol, validate_quantity, validate_side, validate_price,
     log_order, handle_api_error, logger, format_number
 )
+from price_cache import get_current_price
+import ws_trade
 
-def get_current_price(client, symbol):
-    """Get current market price for a symbol"""
-    try:
-        ticker = client.futures_symbol_ticker(symbol=symbol)
-        return float(ticker['price'])
-    except Exception as e:
-        raise Exception(f"Could not get price for {symbol}: {e}")
+# Direction of the stop from the current price for each side
+PRICE_SIGN = {'BUY': 1, 'SELL': -1}
 
 def validate_stop_limit_prices(current_price, stop_price, limit_price, side):
     """
@@ -37,24 +34,17 @@ def validate_stop_limit_prices(current_price, stop_price, limit_price, side):
     Returns:
         bool: True if prices are valid
     """
-    if side == 'BUY':
-        # For BUY stop-limit: stop_price should be above current price
-        # limit_price should be >= stop_price
-        if stop_price <= current_price:
-            logger.error(f"BUY stop price {stop_price} should be above current price {current_price}")
-            return False
-        if limit_price < stop_price:
-            logger.error(f"BUY limit price {limit_price} should be >= stop price {stop_price}")
-            return False
-    else:  # SELL
-        # For SELL stop-limit: stop_price should be below current price
-        # limit_price should be <= stop_price
-        if stop_price >= current_price:
-            logger.error(f"SELL stop price {stop_price} should be below current price {current_price}")
-            return False
-        if limit_price > stop_price:
-            logger.error(f"SELL limit price {limit_price} should be <= stop price {stop_price}")
-            return False
+    # BUY stops trigger above the price with the limit at or above the stop;
+    # SELL is the mirror image, so flip the sign of both checks.
+    sign = PRICE_SIGN[side]
+    above, at_least = ('above', '>=') if sign > 0 else ('below', '<=')
+    
+    if sign * (stop_price - current_price) <= 0:
+        logger.error("%s stop price %s should be %s current price %s", side, stop_price, above, current_price)
+        return False
+    if sign * (limit_price - stop_price) < 0:
+        logger.error("%s limit price %s should be %s stop price %s", side, limit_price, at_least, stop_price)
+        return False
     
     return True
 
@@ -84,7 +74,7 @@ def place_stop_limit_order(symbol, side, quantity, stop_price, limit_price, dry_
         
         # Get current market price
         current_price = get_current_price(client, symbol)
-        logger.info(f"Current price for {symbol}: {current_price}")
+        logger.info("Current price for %s: %s", symbol, current_price)
         
         # Validate price relationships
         if not validate_stop_limit_prices(current_price, stop_price, limit_price, side):
@@ -118,8 +108,8 @@ def place_stop_limit_order(symbol, side, quantity, stop_price, limit_price, dry_
             'timeInForce': 'GTC'
         }
         
-        logger.info(f"Placing stop-limit order with params: {order_params}")
-        order = client.futures_create_order(**order_params)
+        logger.info("Placing stop-limit order with params: %s", order_params)
+        order = ws_trade.create_order(client, **order_params)
         
         # Log successful order
         log_order(
@@ -133,28 +123,33 @@ def place_stop_limit_order(symbol, side, quantity, stop_price, limit_price, dry_
         )
         
         # Display results
-        print(f"\n✓ Stop-limit order placed successfully!")
-        print(f"Order ID: {order['orderId']}")
-        print(f"Symbol: {order['symbol']}")
-        print(f"Side: {order['side']}")
-        print(f"Type: {order['type']}")
-        print(f"Quantity: {format_number(order['origQty'])}")
-        print(f"Stop Price: {format_number(order['stopPrice'])}")
-        print(f"Limit Price: {format_number(order['price'])}")
-        print(f"Status: {order['status']}")
-        print(f"Current Market Price: {format_number(current_price)}")
-        print(f"Time in Force: {order.get('timeInForce', 'GTC')}")
-        print(f"Timestamp: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+        lines = []
+        lines.append(f"\n✓ Stop-limit order placed successfully!")
+        lines.append(f"Order ID: {order['orderId']}")
+        lines.append(f"Symbol: {order['symbol']}")
+        lines.append(f"Side: {order['side']}")
+        lines.append(f"Type: {order['type']}")
+        lines.append(f"Quantity: {format_number(order['origQty'])}")
+        lines.append(f"Stop Price: {format_number(order['stopPrice'])}")
+        lines.append(f"Limit Price: {format_number(order['price'])}")
+        lines.append(f"Status: {order['status']}")
+        lines.append(f"Current Market Price: {format_number(current_price)}")
+        lines.append(f"Time in Force: {order.get('timeInForce', 'GTC')}")
+        lines.append(f"Timestamp: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
         
         # Explain the order logic
         if side == 'BUY':
-            print(f"\nOrder Logic:")
-            print(f"- When price rises to {stop_price}, a limit BUY order will be placed at {limit_price}")
-            print(f"- This is typically used to enter a position on an upward breakout")
+            lines.append(f"\nOrder Logic:")
+            lines.append(f"- When price rises to {stop_price}, a limit BUY order will be placed at {limit_price}")
+            lines.append(f"- This is typically used to enter a position on an upward breakout")
         else:
-            print(f"\nOrder Logic:")
-            print(f"- When price falls to {stop_price}, a limit SELL order will be placed at {limit_price}")
-            print(f"- This is typically used as a stop-loss to limit losses")
+            lines.append(f"\nOrder Logic:")
+            lines.append(f"- When price falls to {stop_price}, a limit SELL order will be placed at {limit_price}")
+            lines.append(f"- This is typically used as a stop-loss to limit losses")
+        
+        # One write so concurrent orders don't interleave their output
+        sys.stdout.write('\n'.join(lines) + '\n')
+        sys.stdout.flush()
         
         return order
         
@@ -165,8 +160,8 @@ def place_stop_limit_order(symbol, side, quantity, stop_price, limit_price, dry_
         print(f"\n✗ Error: {error_msg}")
         return None
 
-def main():
-    """Main function for CLI interface"""
+def _build_parser():
+    """Build the stop-limit command line parser (only needed when run as a script)"""
     parser = argparse.ArgumentParser(
         description='Binance Futures Stop-Limit Order Bot',
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -195,6 +190,11 @@ Note:
     parser.add_argument('--dry-run', action='store_true', 
                        help='Test order without actually placing it')
     
+    return parser
+
+def main():
+    """Main function for CLI interface"""
+    parser = _build_parser()
     args = parser.parse_args()
     
     print(f"\n=== Binance Futures Stop-Limit Order Bot ===")
@@ -5,10 +5,11 @@ Usage: python src/advanced/twap.py BTCUSDT BUY 1.0 60 5
 """
 
 import argparse
+import asyncio
+import math
 import sys
 import os
 import time
-import threading
 from datetime import datetime, timedelta
 
 # Add parent directory to path to import modules
@@ -17,16 +18,20 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from config import Config
 from utils import (
     validate_symbol, validate_quantity, validate_side,
-    log_order, handle_api_error, logger, format_number
+    log_order, handle_api_error, logger, format_number, get_symbol_filters,
+    round_down_to_step, confirm_action
 )
+from price_cache import get_current_price, get_price_cache, PRICE_MAX_AGE
+from runtime import submit
+from user_stream import get_user_stream
+import ws_trade
 
-def get_current_price(client, symbol):
-    """Get current market price for a symbol"""
-    try:
-        ticker = client.futures_symbol_ticker(symbol=symbol)
-        return float(ticker['price'])
-    except Exception as e:
-        raise Exception(f"Could not get price for {symbol}: {e}")
+# Seconds to wait after the last slice for fills to arrive on the user-data stream
+FILL_TIMEOUT_SECONDS = 10
+
+# Slices due within this many seconds of each other go out as one batch
+BATCH_WINDOW_SECONDS = 1.0
+BATCH_PLACE_SIZE = 5  # Binance batchOrders limit
 
 def calculate_twap_schedule(total_quantity, duration_minutes, num_orders):
     """
@@ -48,67 +53,245 @@ def calculate_twap_schedule(total_quantity, duration_minutes, num_orders):
     
     return schedule
 
-def execute_twap_order(symbol, side, quantity, delay, client, order_number, total_orders):
+def split_twap_quantity(total_quantity, num_orders, step_size, decimals):
     """
-    Execute a single TWAP order after delay
+    Split a quantity into lot-step multiples that differ by at most one step
     Args:
-        symbol (str): Trading symbol
-        side (str): Order side
-        quantity (float): Order quantity
-        delay (float): Delay in seconds before execution
+        total_quantity (float): Total quantity to execute
+        num_orders (int): Number of orders to split into
+        step_size (float): Lot step from get_symbol_filters
+        decimals (int): quantityDecimals for the step
+    Returns:
+        tuple: (list of slice quantities, quantity finer than the lot step left over)
+    """
+    # Rounded down as a whole, so the strategy never trades more than asked
+    total_steps = int(round_down_to_step(total_quantity / step_size, 1, 0))
+    base_steps, extra_steps = divmod(total_steps, num_orders)
+    
+    # The steps that do not divide evenly go one each to the last slices,
+    # so no slice is more than one step larger than the others
+    quantities = [
+        round((base_steps + (index >= num_orders - extra_steps)) * step_size, decimals)
+        for index in range(num_orders)
+    ]
+    unplaced = round(total_quantity - total_steps * step_size, 8)
+    return quantities, unplaced
+
+def group_twap_schedule(schedule, window=None, max_size=None):
+    """
+    Group consecutive slices that fall due close together into batches
+    Args:
+        schedule (list): (quantity, delay_seconds) tuples
+        window (float): Slices within this many seconds of a batch's first slice join it
+        max_size (int): Most orders per batch (the batchOrders limit)
+    Returns:
+        list: (delay_seconds, [(order_number, quantity), ...]) per batch
+    """
+    window = BATCH_WINDOW_SECONDS if window is None else window
+    max_size = BATCH_PLACE_SIZE if max_size is None else max_size
+    
+    groups = []
+    for order_number, (quantity, delay) in enumerate(schedule, 1):
+        if groups and delay - groups[-1][0] < window and len(groups[-1][1]) < max_size:
+            groups[-1][1].append((order_number, quantity))
+        else:
+            groups.append((delay, [(order_number, quantity)]))
+    
+    return groups
+
+async def execute_twap_batch(order_template, slices, deadline, client, total_orders, fills):
+    """
+    Execute TWAP orders that fall due together as one request at their deadline
+    Args:
+        order_template (dict): Order parameters shared by every slice
+        slices (list): (order_number, quantity) tuples, at most BATCH_PLACE_SIZE
+        deadline (float): time.monotonic() at which to send the orders
         client: Binance client
-        order_number (int): Current order number
         total_orders (int): Total number of orders
+        fills (dict): newClientOrderId -> Future, shared with the stream listener
     Returns:
-        dict: Order result or None
+        list: Order result (with a pending 'fill' future) or None for each slice
     """
+    symbol, side = order_template['symbol'], order_template['side']
+    first, last = slices[0][0], slices[-1][0]
+    label = str(first) if first == last else f"{first}-{last}"
+    
+    current_price = None
+    slice_fills = [None] * len(slices)
     try:
-        if delay > 0:
-            logger.info(f"TWAP Order {order_number}/{total_orders}: Waiting {delay:.1f} seconds")
-            time.sleep(delay)
+        # Sleep to an absolute deadline so latency elsewhere never shifts the schedule
+        sleep_for = deadline - time.monotonic()
+        if sleep_for > 0:
+            logger.info("TWAP Order %s/%s: Waiting %.1f seconds", label, total_orders, sleep_for)
+            await asyncio.sleep(sleep_for)
         
-        # Get current price
-        current_price = get_current_price(client, symbol)
+        # Get current price (streamed bookTicker, REST only if stale)
+        current_price = await asyncio.to_thread(get_current_price, client, symbol)
         
-        # Log order attempt
-        log_order(f"TWAP_ORDER_{order_number}_ATTEMPT", symbol, side, quantity, current_price)
-        
-        # Place market order
-        order_params = {
-            'symbol': symbol,
-            'side': side,
-            'type': 'MARKET',
-            'quantity': quantity,
-        }
-        
-        order = client.futures_create_order(**order_params)
-        
-        # Log successful order
-        log_order(
-            f"TWAP_ORDER_{order_number}_SUCCESS", 
-            symbol, 
-            side, 
-            quantity, 
-            current_price,
-            order_id=order['orderId'], 
-            status=order['status']
-        )
-        
-        print(f"✓ TWAP Order {order_number}/{total_orders} executed: {format_number(quantity)} @ {format_number(current_price)}")
-        
-        return {
-            'order': order,
-            'price': current_price,
-            'timestamp': datetime.now(),
-            'order_number': order_number
-        }
+        loop = asyncio.get_running_loop()
+        orders = []
+        for index, (order_number, quantity) in enumerate(slices):
+            # Log order attempt
+            log_order(f"TWAP_ORDER_{order_number}_ATTEMPT", symbol, side, quantity, current_price)
+            
+            # Register for the fill before sending, so an early update is not missed
+            client_order_id = ws_trade.new_client_order_id()
+            slice_fills[index] = fills[client_order_id] = loop.create_future()
+            
+            orders.append({
+                **order_template,
+                'quantity': format_number(quantity),  # Already a lot-step multiple
+                'newClientOrderId': client_order_id
+            })
         
+        # Sent over the persistent WebSocket API session, off the event loop; a lone
+        # order falls back to futures_create_order, several to one batchOrders call
+        if len(orders) == 1:
+            responses = [await asyncio.to_thread(ws_trade.create_order, client, **orders[0])]
+        else:
+            responses = await asyncio.to_thread(ws_trade.create_orders, client, orders)
     except Exception as e:
-        error_msg = handle_api_error(e, f"TWAP_ORDER_{order_number}")
+        responses = [e] * len(slices)
+    
+    # Each slice is recorded on its own, so a reporting error on one never
+    # marks the batch's other (placed) orders as failed
+    results = []
+    for (order_number, quantity), order, fill in zip(slices, responses, slice_fills):
+        try:
+            result = _record_twap_order(
+                order_template, quantity, current_price, order, fill, order_number, total_orders
+            )
+        except Exception as e:
+            logger.error("Could not record TWAP order %s: %s", order_number, e)
+            result = None if isinstance(order, Exception) else _twap_result(order, current_price, fill, order_number)
+        results.append(result)
+    
+    return results
+
+def _record_twap_order(order_template, quantity, current_price, order, fill, order_number, total_orders):
+    """
+    Log and report the outcome of one TWAP order
+    Args:
+        order_template (dict): Order parameters shared by every slice
+        quantity (float): Order quantity
+        order: Order response, or the exception the order failed with
+        fill: Future for the order's fill price
+    Returns:
+        dict: Order result or None if the order failed
+    """
+    symbol, side = order_template['symbol'], order_template['side']
+    
+    if isinstance(order, Exception):
+        error_msg = handle_api_error(order, f"TWAP_ORDER_{order_number}")
         log_order(f"TWAP_ORDER_{order_number}_FAILED", symbol, side, quantity, 
                  error=error_msg, status="FAILED")
         print(f"✗ TWAP Order {order_number}/{total_orders} failed: {error_msg}")
         return None
+    
+    # Log successful order
+    log_order(
+        f"TWAP_ORDER_{order_number}_SUCCESS", 
+        symbol, 
+        side, 
+        quantity, 
+        current_price,
+        order_id=order['orderId'], 
+        status=order['status']
+    )
+    
+    # Already filled in the response; otherwise wait for ORDER_TRADE_UPDATE
+    if order['status'] == 'FILLED' and float(order.get('avgPrice') or 0) > 0:
+        _set_fill(fill, float(order['avgPrice']))
+    
+    print(f"✓ TWAP Order {order_number}/{total_orders} sent: {format_number(quantity)} @ ~{format_number(current_price)}")
+    
+    return _twap_result(order, current_price, fill, order_number)
+
+def _twap_result(order, current_price, fill, order_number):
+    """Result entry for a placed TWAP order, as collected by the strategy"""
+    return {
+        'order': order,
+        'price': current_price,
+        'fill': fill,
+        'ts_ns': time.time_ns(),  # Wall clock; only formatted for display
+        'order_number': order_number
+    }
+
+def _set_fill(fill, price):
+    """Resolve a fill future once (runs on the event loop)"""
+    if not fill.done():
+        fill.set_result(price)
+
+async def collect_fills(symbol, results, client):
+    """
+    Replace each order's reference price with its actual average fill price
+    Args:
+        symbol (str): Trading symbol
+        results (list): Slice results from execute_twap_batch
+        client: Binance client
+    """
+    sent = [result for result in results if isinstance(result, dict)]
+    if not sent:
+        return
+    
+    await asyncio.wait([result['fill'] for result in sent], timeout=FILL_TIMEOUT_SECONDS)
+    
+    for result in sent:
+        fill = result.pop('fill')
+        if fill.done():
+            result['price'] = fill.result()
+            continue
+        
+        # No fill event in time, ask REST; keep the reference price if still unknown
+        order_id = result['order'].get('orderId')
+        try:
+            order = await asyncio.to_thread(client.futures_get_order, symbol=symbol, orderId=order_id)
+            if float(order.get('avgPrice') or 0) > 0:
+                result['price'] = float(order['avgPrice'])
+        except Exception as e:
+            logger.warning("Could not get fill price for TWAP order %s: %s", order_id, e)
+
+async def run_twap_schedule(order_template, schedule, client):
+    """
+    Run all TWAP slices concurrently
+    Args:
+        order_template (dict): Order parameters shared by every slice
+        schedule (list): (quantity, delay_seconds) tuples
+        client: Binance client
+    Returns:
+        list: Order result, None or exception for each slice, in schedule order
+    """
+    loop = asyncio.get_running_loop()
+    fills = {}  # newClientOrderId -> Future resolved with the average fill price
+    
+    def on_order_update(order):
+        # Runs on the websocket thread; hand the fill over to the loop
+        fill = fills.get(order['c'])
+        if fill is not None and order['X'] == 'FILLED':
+            loop.call_soon_threadsafe(_set_fill, fill, float(order['ap']))
+    
+    user_stream = get_user_stream()
+    user_stream.add_listener(on_order_update)
+    try:
+        # All deadlines hang off one start time
+        start = time.monotonic()
+        groups = group_twap_schedule(schedule)
+        tasks = [
+            asyncio.create_task(
+                execute_twap_batch(order_template, slices, start + delay, client, len(schedule), fills)
+            )
+            for delay, slices in groups
+        ]
+        
+        results = []
+        for (delay, slices), outcome in zip(groups, await asyncio.gather(*tasks, return_exceptions=True)):
+            results.extend(outcome if isinstance(outcome, list) else [outcome] * len(slices))
+        
+        await collect_fills(order_template['symbol'], results, client)
+    finally:
+        user_stream.remove_listener(on_order_update)
+    
+    return results
 
 def execute_twap_strategy(symbol, side, total_quantity, duration_minutes, num_orders, dry_run=False):
     """
@@ -139,10 +322,33 @@ def execute_twap_strategy(symbol, side, total_quantity, duration_minutes, num_or
         # Get Binance client
         client = Config.get_client()
         
-        # Calculate execution schedule
-        schedule = calculate_twap_schedule(total_quantity, duration_minutes, num_orders)
+        # Slices are whole lot steps, spread as evenly as the step allows
+        filters = get_symbol_filters(client, symbol)
+        step_size = filters['stepSize']
+        quantities, unplaced = split_twap_quantity(
+            total_quantity, num_orders, step_size, filters['quantityDecimals']
+        )
+        slice_quantity, last_quantity = quantities[0], quantities[-1]
+        if slice_quantity < filters['minQty']:
+            raise ValueError(f"Quantity per order {format_number(slice_quantity)} is below the minimum {filters['minQty']}")
         
-        # Get initial price for reference
+        # Specialise the order once: slices only add their quantity and client order id
+        order_template = {
+            'symbol': symbol,
+            'side': side,
+            'type': 'MARKET',
+            'newOrderRespType': 'RESULT',  # Filled market orders come back with avgPrice
+        }
+        
+        # Calculate execution schedule, in the quantity actually sent
+        schedule = [
+            (quantity, delay)
+            for quantity, (_, delay) in zip(
+                quantities, calculate_twap_schedule(total_quantity, duration_minutes, num_orders)
+            )
+        ]
+        
+        # The stream is not subscribed yet, so the reference price comes over REST
         initial_price = get_current_price(client, symbol)
         
         # Log strategy start
@@ -153,11 +359,19 @@ def execute_twap_strategy(symbol, side, total_quantity, duration_minutes, num_or
         print(f"Total Quantity: {format_number(total_quantity)}")
         print(f"Duration: {duration_minutes} minutes")
         print(f"Number of Orders: {num_orders}")
-        print(f"Quantity per Order: {format_number(total_quantity / num_orders)}")
+        if last_quantity != slice_quantity:
+            larger = quantities.count(last_quantity)
+            print(f"Quantity per Order: {format_number(slice_quantity)} (last {larger} orders {format_number(last_quantity)})")
+        else:
+            print(f"Quantity per Order: {format_number(slice_quantity)}")
+        if unplaced > 0:
+            logger.warning("TWAP leaves %s %s unplaced (below the lot step %s)", unplaced, symbol, step_size)
+            print(f"⚠️  {format_number(unplaced)} is below the lot step and will not be traded")
         print(f"Interval: {duration_minutes * 60 / num_orders:.1f} seconds")
         print(f"Initial Price: {format_number(initial_price)}")
-        print(f"Start Time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-        print(f"Estimated End Time: {(datetime.now() + timedelta(minutes=duration_minutes)).strftime('%Y-%m-%d %H:%M:%S')}")
+        now = datetime.now()
+        print(f"Start Time: {now.strftime('%Y-%m-%d %H:%M:%S')}")
+        print(f"Estimated End Time: {(now + timedelta(minutes=duration_minutes)).strftime('%Y-%m-%d %H:%M:%S')}")
         
         if dry_run:
             print(f"\n🧪 DRY RUN MODE - No real orders will be placed")
@@ -170,32 +384,38 @@ def execute_twap_strategy(symbol, side, total_quantity, duration_minutes, num_or
                 'schedule': schedule
             }
         
+        # Stream prices for the slices; a dry run never opens the socket
+        get_price_cache().subscribe(symbol)
+        
         # Execute orders
         results = []
-        successful_orders = 0
-        total_executed_quantity = 0.0
-        total_cost = 0.0
+        filled_quantities = []  # Per-slice columns, summed once below
+        filled_costs = []  # For sells these are proceeds
         
-        start_time = datetime.now()
+        start_time = time.monotonic()
         
-        for i, (quantity, delay) in enumerate(schedule, 1):
-            result = execute_twap_order(symbol, side, quantity, delay, client, i, num_orders)
+        # Every slice is scheduled up front on the shared loop and waits out its own delay;
+        # prices in the results are the fills reported by the user-data stream
+        slice_results = submit(run_twap_schedule(order_template, schedule, client)).result()
+        
+        for i, ((quantity, delay), result) in enumerate(zip(schedule, slice_results), 1):
+            if isinstance(result, Exception):
+                logger.error("TWAP Order %s raised: %r", i, result)
+                result = None
             
             if result:
                 results.append(result)
-                successful_orders += 1
-                total_executed_quantity += quantity
-                
-                # Calculate cost/proceeds
-                if side == 'BUY':
-                    total_cost += quantity * result['price']
-                else:
-                    total_cost += quantity * result['price']  # For sells, this is proceeds
+                filled_quantities.append(quantity)
+                filled_costs.append(quantity * result['price'])
             else:
-                print(f"⚠️  Order {i} failed - continuing with remaining orders...")
+                print(f"⚠️  Order {i} failed - excluded from the totals")
+        
+        # fsum keeps long schedules free of accumulated rounding error
+        successful_orders = len(filled_quantities)
+        total_executed_quantity = math.fsum(filled_quantities)
+        total_cost = math.fsum(filled_costs)
         
-        end_time = datetime.now()
-        duration_actual = (end_time - start_time).total_seconds() / 60
+        duration_actual = (time.monotonic() - start_time) / 60
         
         # Calculate average execution price
         if total_executed_quantity > 0:
@@ -203,8 +423,11 @@ def execute_twap_strategy(symbol, side, total_quantity, duration_minutes, num_or
         else:
             avg_price = 0
         
-        # Get final price for comparison
-        final_price = get_current_price(client, symbol)
+        # Get final price for comparison: the stream has been running all along, and
+        # if it is stale the last fill is recent enough, so no extra REST round trip
+        final_price = get_price_cache().get_price(symbol, PRICE_MAX_AGE)
+        if final_price is None:
+            final_price = results[-1]['price'] if results else get_current_price(client, symbol)
         
         # Log strategy completion
         log_order("TWAP_STRATEGY_COMPLETE", symbol, side, total_executed_quantity,
@@ -222,7 +445,7 @@ def execute_twap_strategy(symbol, side, total_quantity, duration_minutes, num_or
         print(f"Execution vs Initial: {((avg_price - initial_price) / initial_price * 100):+.3f}%")
         print(f"Actual Duration: {duration_actual:.1f} minutes")
         print(f"Total Cost/Proceeds: {format_number(total_cost)} USDT")
-        print(f"Completion Time: {end_time.strftime('%Y-%m-%d %H:%M:%S')}")
+        print(f"Completion Time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
         
         return {
             'status': 'COMPLETED',
@@ -306,8 +529,7 @@ Strategy Benefits:
         estimated_end = datetime.now() + timedelta(minutes=args.duration)
         print(f"⚠️  This will execute {args.orders} orders over {args.duration} minutes")
         print(f"   Estimated completion: {estimated_end.strftime('%H:%M:%S')}")
-        response = input("   Continue? (y/N): ")
-        if response.lower() not in ['y', 'yes']:
+        if not confirm_action("   Continue?"):
             print("Strategy cancelled by user")
             sys.exit(0)
     
@@ -0,0 +1,44 @@
+# src/bot_client.py
+"""
+Binance REST Client Subclass
+Kept out of config.py so the binance package is only imported once a
+client is actually needed.
+"""
+
+import hashlib
+import hmac
+
+from binance import Client
+from binance.exceptions import BinanceAPIException, BinanceRequestException
+
+from utils import from_json
+
+class BotClient(Client):
+    """Binance client with a reusable HMAC key schedule and fast JSON decoding"""
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # The secret never changes, so key the HMAC once and copy it per request
+        self._base_hmac = None
+        if self.API_SECRET:
+            self._base_hmac = hmac.new(self.API_SECRET.encode('utf-8'), digestmod=hashlib.sha256)
+    
+    def _hmac_signature(self, query_string):
+        """Sign a query string from a copy of the pre-keyed HMAC"""
+        base_hmac = getattr(self, '_base_hmac', None)
+        if base_hmac is None:
+            return super()._hmac_signature(query_string)
+        
+        mac = base_hmac.copy()
+        mac.update(query_string.encode('utf-8'))
+        return mac.hexdigest()
+    
+    @staticmethod
+    def _handle_response(response):
+        """Raise on API errors, otherwise return the decoded body"""
+        if not (200 <= response.status_code < 300):
+            raise BinanceAPIException(response, response.status_code, response.text)
+        try:
+            return from_json(response.content)
+        except ValueError:
+            raise BinanceRequestException('Invalid Response: %s' % response.text)
@@ -1,6 +1,10 @@
+import atexit
 import os
+import threading
 from dotenv import load_dotenv
-from binance import Client
+
+# The binance package (and requests/urllib3 with it) is imported on first
+# client use, so --help and argument errors don't pay for it.
 
 # Load environment variables from .env file
 load_dotenv()
@@ -16,17 +20,88 @@ class Config:
     # Trading Configuration
     DEFAULT_QUANTITY = 0.01
     MAX_RETRY_ATTEMPTS = 3
+    HTTP_POOL_SIZE = 20  # Keep-alive connections per host (covers concurrent REST workers)
+    HTTP_TIMEOUT = (2.0, 5.0)  # (connect, read) seconds, so a stuck socket can't hang a strategy
+    
+    # Shared REST client (created on first use)
+    _client = None
+    _client_lock = threading.Lock()
+    
+    # Shared websocket manager (started on first use)
+    _socket_manager = None
+    _socket_lock = threading.Lock()
     
     @classmethod
     def get_client(cls):
-        """Get configured Binance client"""
+        """Get the shared Binance client, creating it on first use"""
         if not cls.API_KEY or not cls.SECRET_KEY:
             raise ValueError("API credentials not found. Please check your .env file")
         
-        if cls.USE_TESTNET:
-            return Client(cls.API_KEY, cls.SECRET_KEY, testnet=True)
-        else:
-            return Client(cls.API_KEY, cls.SECRET_KEY)
+        with cls._client_lock:
+            if cls._client is None:
+                from bot_client import BotClient
+                
+                requests_params = {'timeout': cls.HTTP_TIMEOUT}
+                if cls.USE_TESTNET:
+                    client = BotClient(cls.API_KEY, cls.SECRET_KEY, requests_params=requests_params, testnet=True)
+                else:
+                    client = BotClient(cls.API_KEY, cls.SECRET_KEY, requests_params=requests_params)
+                
+                cls._configure_session(client.session)
+                # Close pooled connections cleanly when the CLI exits
+                atexit.register(client.session.close)
+                cls._client = client
+        
+        return cls._client
+    
+    @classmethod
+    def _configure_session(cls, session):
+        """Size the keep-alive pool and retry transient server errors"""
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+        
+        # Only reads are retried: urllib3's default list includes DELETE, and a cancel
+        # whose response was lost comes back from the retry as -2011 "Unknown order".
+        # New orders (POST) are never resent.
+        # 418/429 are left alone: retrying a rate limit or IP ban only extends it.
+        # An exhausted retry returns the last response, so the client still raises
+        # BinanceAPIException for it rather than requests' RetryError.
+        retry = Retry(
+            total=cls.MAX_RETRY_ATTEMPTS,
+            backoff_factor=0.2,
+            status_forcelist=[500, 502, 503, 504],
+            allowed_methods=frozenset({'GET'}),
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(
+            pool_connections=cls.HTTP_POOL_SIZE,
+            pool_maxsize=cls.HTTP_POOL_SIZE,
+            max_retries=retry
+        )
+        session.mount('https://', adapter)
+        session.headers['Connection'] = 'keep-alive'
+    
+    @classmethod
+    def get_socket_manager(cls):
+        """Get the shared websocket manager, starting it on first use"""
+        if not cls.API_KEY or not cls.SECRET_KEY:
+            raise ValueError("API credentials not found. Please check your .env file")
+        
+        with cls._socket_lock:
+            if cls._socket_manager is None:
+                from binance import ThreadedWebsocketManager
+                
+                manager = ThreadedWebsocketManager(
+                    api_key=cls.API_KEY,
+                    api_secret=cls.SECRET_KEY,
+                    testnet=cls.USE_TESTNET
+                )
+                # Don't keep the process alive once the CLI is done
+                manager.daemon = True
+                manager.start()
+                cls._socket_manager = manager
+        
+        return cls._socket_manager
     
     @classmethod
     def validate_config(cls):
@@ -5,6 +5,7 @@ Usage: python src/limit_orders.py BTCUSDT BUY 0.01 45000
 """
 
 import argparse
+import queue
 import sys
 import time
 from datetime import datetime
@@ -12,16 +13,15 @@ from datetime import datetime
 from config import Config
 from utils import (
     validate_symbol, validate_quantity, validate_side, validate_price,
-    log_order, handle_api_error, logger, format_number
+    log_order, handle_api_error, logger, format_number, get_symbol_filters,
+    round_down_to_step, confirm_action
 )
+from price_cache import get_current_price
+from user_stream import get_user_stream
 
-def get_current_price(client, symbol):
-    """Get current market price for a symbol"""
-    try:
-        ticker = client.futures_symbol_ticker(symbol=symbol)
-        return float(ticker['price'])
-    except Exception as e:
-        raise Exception(f"Could not get price for {symbol}: {e}")
+# Longest wait per status check; check_order_status waits max_checks of these in total
+STATUS_CHECK_INTERVAL = 10
+FINAL_STATUSES = ('FILLED', 'CANCELED', 'EXPIRED')
 
 def validate_limit_price(current_price, limit_price, side):
     """
@@ -37,14 +37,14 @@ def validate_limit_price(current_price, limit_price, side):
     
     # Warn if price is too far from market
     if price_diff_percent > 50:
-        logger.warning(f"Limit price {limit_price} is {price_diff_percent:.1f}% away from market price {current_price}")
+        logger.warning("Limit price %s is %.1f%% away from market price %s", limit_price, price_diff_percent, current_price)
         return False
     
     # Check if limit price makes sense for the side
     if side == 'BUY' and limit_price > current_price * 1.1:
-        logger.warning(f"BUY limit price {limit_price} is significantly above market price {current_price}")
+        logger.warning("BUY limit price %s is significantly above market price %s", limit_price, current_price)
     elif side == 'SELL' and limit_price < current_price * 0.9:
-        logger.warning(f"SELL limit price {limit_price} is significantly below market price {current_price}")
+        logger.warning("SELL limit price %s is significantly below market price %s", limit_price, current_price)
     
     return True
 
@@ -70,15 +70,23 @@ def place_limit_order(symbol, side, quantity, price, dry_run=False):
         # Get Binance client
         client = Config.get_client()
         
+        # Snap to the symbol's tick and lot step (the exchange rejects anything else)
+        filters = get_symbol_filters(client, symbol)
+        tick_size, step_size = filters['tickSize'], filters['stepSize']
+        price = round_down_to_step(price, tick_size, filters['priceDecimals'])
+        quantity = round_down_to_step(quantity, step_size, filters['quantityDecimals'])
+        if quantity < filters['minQty']:
+            raise ValueError(f"Quantity below minimum {filters['minQty']} for {symbol}")
+        logger.info("Order rounded to filters: quantity %s, price %s", quantity, price)
+        
         # Get current market price for validation
         current_price = get_current_price(client, symbol)
-        logger.info(f"Current price for {symbol}: {current_price}")
+        logger.info("Current price for %s: %s", symbol, current_price)
         
         # Validate limit price makes sense
         if not validate_limit_price(current_price, price, side):
             print(f"Warning: Limit price {price} may not be optimal compared to market price {current_price}")
-            response = input("Continue anyway? (y/N): ")
-            if response.lower() not in ['y', 'yes']:
+            if not confirm_action("Continue anyway?"):
                 print("Order cancelled by user")
                 return None
         
@@ -107,7 +115,7 @@ def place_limit_order(symbol, side, quantity, price, dry_run=False):
             'timeInForce': 'GTC'  # Good Till Cancel
         }
         
-        logger.info(f"Placing limit order with params: {order_params}")
+        logger.info("Placing limit order with params: %s", order_params)
         order = client.futures_create_order(**order_params)
         
         # Log successful order
@@ -144,31 +152,51 @@ def place_limit_order(symbol, side, quantity, price, dry_run=False):
         print(f"\n✗ Error: {error_msg}")
         return None
 
+def _print_order_status(label, status, executed_qty, orig_qty):
+    """Print one order status snapshot"""
+    print(f"\nOrder Status {label}:")
+    print(f"Status: {status}")
+    print(f"Executed Quantity: {format_number(executed_qty)}")
+    print(f"Remaining Quantity: {format_number(float(orig_qty) - float(executed_qty))}")
+
 def check_order_status(order_id, symbol, max_checks=5):
     """
     Check the status of a placed order
+    Follows ORDER_TRADE_UPDATE events on the user-data stream instead of
+    polling, for up to max_checks * STATUS_CHECK_INTERVAL seconds.
     Args:
         order_id (str): Order ID to check
         symbol (str): Trading symbol
         max_checks (int): Maximum number of status checks
+    Returns:
+        dict: Latest order status or None if it could not be checked
     """
+    user_stream = None
     try:
         client = Config.get_client()
         
-        for i in range(max_checks):
-            order_status = client.futures_get_order(symbol=symbol, orderId=order_id)
-            
-            print(f"\nOrder Status Check #{i+1}:")
-            print(f"Status: {order_status['status']}")
-            print(f"Executed Quantity: {format_number(order_status['executedQty'])}")
-            print(f"Remaining Quantity: {format_number(float(order_status['origQty']) - float(order_status['executedQty']))}")
-            
-            if order_status['status'] in ['FILLED', 'CANCELED', 'EXPIRED']:
+        updates = queue.Queue()  # Order payloads pushed from the websocket thread
+        user_stream = get_user_stream()
+        user_stream.watch_order(order_id, updates.put)
+        
+        # One REST read covers anything that happened before the watch was registered
+        order_status = client.futures_get_order(symbol=symbol, orderId=order_id)
+        _print_order_status("Check", order_status['status'], order_status['executedQty'], order_status['origQty'])
+        
+        if order_status['status'] not in FINAL_STATUSES:
+            print("Order still open, waiting for updates...")
+        
+        deadline = time.monotonic() + max_checks * STATUS_CHECK_INTERVAL
+        update_number = 0
+        while order_status['status'] not in FINAL_STATUSES:
+            try:
+                update = updates.get(timeout=max(0, deadline - time.monotonic()))
+            except queue.Empty:
                 break
             
-            if i < max_checks - 1:
-                print("Order still open, checking again in 10 seconds...")
-                time.sleep(10)
+            update_number += 1
+            order_status = dict(order_status, status=update['X'], executedQty=update['z'])
+            _print_order_status(f"Update #{update_number}", update['X'], update['z'], order_status['origQty'])
         
         return order_status
         
@@ -176,6 +204,9 @@ def check_order_status(order_id, symbol, max_checks=5):
         error_msg = handle_api_error(e, "ORDER_STATUS_CHECK")
         print(f"Could not check order status: {error_msg}")
         return None
+    finally:
+        if user_stream is not None:
+            user_stream.unwatch_order(order_id)
 
 def main():
     """Main function for CLI interface"""
@@ -212,6 +243,10 @@ Examples:
     print(f"Timestamp: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     print(f"=========================================\n")
     
+    # Open the user-data stream before placing, so a fast fill is not missed
+    if args.check_status and not args.dry_run:
+        get_user_stream()
+    
     # Place the order
     result = place_limit_order(args.symbol, args.side, args.quantity, args.price, args.dry_run)
     
@@ -13,21 +13,7 @@ from utils import (
     validate_symbol, validate_quantity, validate_side,
     log_order, handle_api_error, logger, format_number
 )
-
-def get_current_price(client, symbol):
-    """
-    Get current market price for a symbol
-    Args:
-        client: Binance client
-        symbol (str): Trading symbol
-    Returns:
-        float: Current price
-    """
-    try:
-        ticker = client.futures_symbol_ticker(symbol=symbol)
-        return float(ticker['price'])
-    except Exception as e:
-        raise Exception(f"Could not get price for {symbol}: {e}")
+from price_cache import get_current_price
 
 def check_account_balance(client, required_quantity, current_price, side):
     """
@@ -47,7 +33,7 @@ def check_account_balance(client, required_quantity, current_price, side):
         if side == 'BUY':
             required_balance = required_quantity * current_price
             if available_balance < required_balance:
-                logger.warning(f"Insufficient balance. Required: {required_balance}, Available: {available_balance}")
+                logger.warning("Insufficient balance. Required: %s, Available: %s", required_balance, available_balance)
                 return False
         
         # For SELL orders, we should check position size
@@ -55,7 +41,7 @@ def check_account_balance(client, required_quantity, current_price, side):
         return True
         
     except Exception as e:
-        logger.error(f"Could not check account balance: {e}")
+        logger.error("Could not check account balance: %s", e)
         return False
 
 def place_market_order(symbol, side, quantity, dry_run=False):
@@ -80,7 +66,7 @@ def place_market_order(symbol, side, quantity, dry_run=False):
         
         # Get current price for logging and balance check
         current_price = get_current_price(client, symbol)
-        logger.info(f"Current price for {symbol}: {current_price}")
+        logger.info("Current price for %s: %s", symbol, current_price)
         
         # Check account balance
         if not check_account_balance(client, quantity, current_price, side):
@@ -108,7 +94,7 @@ def place_market_order(symbol, side, quantity, dry_run=False):
             'quantity': quantity,
         }
         
-        logger.info(f"Placing order with params: {order_params}")
+        logger.info("Placing order with params: %s", order_params)
         order = client.futures_create_order(**order_params)
         
         # Log successful order
@@ -0,0 +1,124 @@
+# src/price_cache.py
+"""
+Binance Futures bookTicker Price Cache
+Keeps the latest mid price per symbol from the <symbol>@bookTicker stream so
+price lookups are a dict read instead of a futures_symbol_ticker round trip.
+"""
+
+import threading
+import time
+
+from config import Config
+from utils import logger
+
+# Streamed prices older than this are not trusted for order validation
+PRICE_MAX_AGE = 0.5
+
+class PriceCache:
+    """Latest mid prices pushed by the futures bookTicker stream"""
+
+    def __init__(self):
+        self._prices = {}  # symbol -> (latest mid price, time.monotonic() received)
+        self._sockets = {}  # symbol -> socket name
+        self._lock = threading.Lock()
+
+    def subscribe(self, symbol):
+        """
+        Start streaming book ticker updates for a symbol
+        Args:
+            symbol (str): Trading symbol (e.g., BTCUSDT)
+        """
+        with self._lock:
+            if symbol in self._sockets:
+                return
+
+            manager = Config.get_socket_manager()
+            self._sockets[symbol] = manager.start_futures_multiplex_socket(
+                callback=self._on_book_ticker,
+                streams=[f"{symbol.lower()}@bookTicker"]
+            )
+            logger.info("bookTicker stream started for %s", symbol)
+
+    def is_streaming(self, symbol):
+        """
+        Check whether a symbol's bookTicker stream has been started
+        Args:
+            symbol (str): Trading symbol
+        Returns:
+            bool: True once subscribe() has been called for the symbol
+        """
+        return symbol in self._sockets
+
+    def _on_book_ticker(self, msg):
+        """Store the mid price from a bookTicker update (runs on the websocket thread)"""
+        data = msg.get('data')
+        if data is None:
+            if msg.get('e') == 'error':
+                logger.error("bookTicker stream error: %s", msg.get('m'))
+            return
+
+        self.set_price(data['s'], (float(data['b']) + float(data['a'])) / 2)
+
+    def set_price(self, symbol, price):
+        """
+        Record the latest price for a symbol
+        Args:
+            symbol (str): Trading symbol
+            price (float): Price observed just now
+        """
+        # Single dict store, atomic under the GIL
+        self._prices[symbol] = (price, time.monotonic())
+
+    def get_price(self, symbol, max_age=None):
+        """
+        Get the latest cached mid price
+        Args:
+            symbol (str): Trading symbol
+            max_age (float, optional): Ignore prices older than this many seconds
+        Returns:
+            float: Mid price, or None if no (fresh enough) update has arrived
+        """
+        entry = self._prices.get(symbol)
+        if entry is None:
+            return None
+
+        price, received_at = entry
+        if max_age is not None and time.monotonic() - received_at > max_age:
+            return None
+        return price
+
+# Shared instance for all strategies in this process
+_price_cache = PriceCache()
+
+def get_price_cache():
+    """Get the shared price cache"""
+    return _price_cache
+
+def get_current_price(client, symbol, max_age=PRICE_MAX_AGE):
+    """
+    Get current market price, from the stream when fresh, otherwise REST
+    Only symbols something else already streams are read from the cache:
+    subscribing here would block a one-shot order on the socket manager's
+    startup for a tick that has not arrived yet. Long-running strategies
+    (grid, TWAP) subscribe themselves.
+    Args:
+        client: Binance client
+        symbol (str): Trading symbol
+        max_age (float): Oldest streamed price to accept, in seconds
+    Returns:
+        float: Current price
+    """
+    if _price_cache.is_streaming(symbol):
+        price = _price_cache.get_price(symbol, max_age)
+        if price is not None:
+            return price
+
+    try:
+        ticker = client.futures_symbol_ticker(symbol=symbol)
+    except Exception as e:
+        raise Exception(f"Could not get price for {symbol}: {e}")
+
+    # Lets lookups right behind this one (before the stream warms up) skip REST too
+    price = float(ticker['price'])
+    _price_cache.set_price(symbol, price)
+    return price
@@ -0,0 +1,45 @@
+# src/runtime.py
+"""
+Shared Background Event Loop
+One asyncio loop running on a daemon thread, so long-lived monitors are
+cheap coroutines instead of one OS thread each.
+"""
+
+import asyncio
+import threading
+
+from utils import logger
+
+try:
+    import uvloop  # Optional libuv-based loop (Linux/macOS)
+except ImportError:
+    uvloop = None
+
+_loop = None
+_loop_lock = threading.Lock()
+
+def get_loop():
+    """
+    Get the shared event loop, starting its thread on first use
+    Returns:
+        asyncio.AbstractEventLoop: Running loop
+    """
+    global _loop
+
+    with _loop_lock:
+        if _loop is None:
+            _loop = uvloop.new_event_loop() if uvloop is not None else asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name='runtime-loop', daemon=True).start()
+            logger.info("Background event loop started")
+
+    return _loop
+
+def submit(coro):
+    """
+    Schedule a coroutine on the shared loop from any thread
+    Args:
+        coro: Coroutine to run
+    Returns:
+        concurrent.futures.Future: Completes with the coroutine's result
+    """
+    return asyncio.run_coroutine_threadsafe(coro, get_loop())
@@ -0,0 +1,101 @@
+# src/user_stream.py
+"""
+Binance Futures User Data Stream
+Pushes ORDER_TRADE_UPDATE events to registered listeners so strategies can
+react to fills as they happen instead of polling futures_get_order.
+"""
+
+import threading
+
+from config import Config
+from utils import logger
+
+class UserDataStream:
+    """Shared futures user-data websocket (one listenKey per process)"""
+
+    def __init__(self):
+        self._listeners = []
+        self._order_watchers = {}  # orderId -> callback, for updates about one order
+        self._lock = threading.Lock()
+        self._socket_name = None
+
+    def start(self):
+        """Open the user-data socket if it is not already running"""
+        with self._lock:
+            if self._socket_name is not None:
+                return
+
+            # The websocket manager fetches the listenKey and keeps it alive
+            manager = Config.get_socket_manager()
+            self._socket_name = manager.start_futures_user_socket(callback=self._on_message)
+            logger.info("Futures user-data stream started")
+
+    def add_listener(self, callback):
+        """
+        Register a callback for order updates
+        Args:
+            callback: Called with the order payload ('o') of every ORDER_TRADE_UPDATE
+        """
+        with self._lock:
+            self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        """Unregister a previously added callback"""
+        with self._lock:
+            if callback in self._listeners:
+                self._listeners.remove(callback)
+
+    def watch_order(self, order_id, callback):
+        """
+        Register a callback for updates to a single order
+        Args:
+            order_id (int): Order to watch
+            callback: Called with the order payload ('o') of its ORDER_TRADE_UPDATEs
+        """
+        with self._lock:
+            self._order_watchers[order_id] = callback
+
+    def unwatch_order(self, order_id):
+        """Stop watching an order"""
+        with self._lock:
+            self._order_watchers.pop(order_id, None)
+
+    def _on_message(self, msg):
+        """Dispatch a raw websocket message to the listeners"""
+        event_type = msg.get('e')
+
+        if event_type == 'error':
+            logger.error("User-data stream error: %s", msg.get('m'))
+            return
+        if event_type == 'listenKeyExpired':
+            # The manager's keepalive fetches a fresh key and reconnects
+            logger.warning("User-data listenKey expired, waiting for the stream to reconnect")
+            return
+        if event_type != 'ORDER_TRADE_UPDATE':
+            return
+
+        order = msg['o']
+        with self._lock:
+            listeners = list(self._listeners)
+            # One dict lookup routes the event to whoever watches this order
+            watcher = self._order_watchers.get(order['i'])
+            if watcher is not None:
+                listeners.append(watcher)
+
+        for callback in listeners:
+            try:
+                callback(order)
+            except Exception as e:
+                logger.error("User-data listener failed: %s", e)
+
+# Shared instance for all strategies in this process
+_user_stream = UserDataStream()
+
+def get_user_stream():
+    """
+    Get the shared user-data stream, starting it on first use
+    Returns:
+        UserDataStream: Running stream instance
+    """
+    _user_stream.start()
+    return _user_stream
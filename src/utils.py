@@ -1,35 +1,150 @@
 # src/utils.py
+import atexit
+import functools
+import json
 import logging
-import re
+import logging.handlers
+import math
+import os
+import queue
 import sys
-import traceback
-from datetime import datetime
-from decimal import Decimal, InvalidOperation
+import threading
+import time
+
+try:
+    import orjson  # Optional C JSON encoder/decoder
+except ImportError:
+    orjson = None
+
+# bot.log is written in blocks: when this many records are buffered, on any
+# ERROR, and at least every LOG_FLUSH_SECONDS
+LOG_BUFFER_RECORDS = 1024
+LOG_FLUSH_SECONDS = 1.0
+
+# Sanity limits for order inputs
+MIN_QUANTITY = 0.001
+MAX_QUANTITY = 1_000_000
+MAX_PRICE = 10_000_000
+
+class CachedTimeFormatter(logging.Formatter):
+    """Formatter that re-renders asctime only when the second changes"""
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._cached_second = None
+        self._cached_time = None
+    
+    def formatTime(self, record, datefmt=None):
+        # Only valid for second-resolution datefmts. Records reach this from
+        # the QueueListener, the log-flush thread and logging's shutdown (all
+        # via MemoryHandler.flush), so the cache relies on the MemoryHandler
+        # and FileHandler locks serialising those calls; keep it behind them.
+        second = int(record.created)
+        if second != self._cached_second:
+            self._cached_time = super().formatTime(record, datefmt)
+            self._cached_second = second
+        return self._cached_time
+
+class JSONFormatter(CachedTimeFormatter):
+    """One JSON object per line, with log_order's fields under an "order" key"""
+    
+    def format(self, record):
+        entry = {
+            'time': self.formatTime(record, self.datefmt),
+            'level': record.levelname,
+            'func': record.funcName,
+            'message': record.getMessage()
+        }
+        order = getattr(record, 'order', None)
+        if order is not None:
+            entry['order'] = order
+        if record.exc_info:
+            entry['traceback'] = self.formatException(record.exc_info)
+        return to_json(entry)
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that enqueues records unformatted"""
+    
+    def prepare(self, record):
+        # The stock prepare() renders the message and any traceback on the
+        # calling thread so the record can be pickled; the queue here is
+        # in-process, so that work is left to the QueueListener thread.
+        # Log arguments must therefore not be mutated after the call.
+        return record
 
 # Configure logging
 def setup_logging():
-    """Setup logging configuration"""
-    logging.basicConfig(
-        filename='bot.log',
-        format='[%(asctime)s] [%(levelname)s] [%(funcName)s] - %(message)s',
-        level=logging.INFO,
-        datefmt='%Y-%m-%d %H:%M:%S'
+    """
+    Setup logging configuration
+    Records are queued by the calling thread and written to bot.log and
+    stdout by a background QueueListener, so order paths never block on I/O.
+    File writes are buffered so bursts of records cost one write.
+    Set BOT_LOG_STDOUT=0 to log to bot.log only (e.g. when run as a service),
+    and BOT_LOG_JSON=1 to write bot.log as JSON lines for log aggregators.
+    """
+    logger = logging.getLogger()
+    
+    # utils can be imported twice under different names (utils / src.utils);
+    # the second import reuses the first one's handlers instead of duplicating them
+    if any(isinstance(h, logging.handlers.QueueHandler) for h in logger.handlers):
+        return logger
+    
+    file_handler = logging.FileHandler('bot.log')
+    if os.getenv('BOT_LOG_JSON') == '1':
+        file_handler.setFormatter(JSONFormatter(datefmt='%Y-%m-%d %H:%M:%S'))
+    else:
+        file_handler.setFormatter(CachedTimeFormatter(
+            '[%(asctime)s] [%(levelname)s] [%(funcName)s] - %(message)s',
+            datefmt='%Y-%m-%d %H:%M:%S'
+        ))
+    buffered_file_handler = logging.handlers.MemoryHandler(
+        LOG_BUFFER_RECORDS, flushLevel=logging.ERROR, target=file_handler, flushOnClose=True
     )
     
-    # Also log to console
-    console_handler = logging.StreamHandler(sys.stdout)
-    console_handler.setLevel(logging.INFO)
-    formatter = logging.Formatter('[%(levelname)s] %(message)s')
-    console_handler.setFormatter(formatter)
+    handlers = [buffered_file_handler]
     
-    logger = logging.getLogger()
-    logger.addHandler(console_handler)
+    # Also log to console, unless disabled for headless runs
+    if os.getenv('BOT_LOG_STDOUT', '1') != '0':
+        console_handler = logging.StreamHandler(sys.stdout)
+        console_handler.setLevel(logging.INFO)
+        formatter = logging.Formatter('[%(levelname)s] %(message)s')
+        console_handler.setFormatter(formatter)
+        handlers.append(console_handler)
+    
+    log_queue = queue.Queue(-1)
+    listener = logging.handlers.QueueListener(
+        log_queue, *handlers, respect_handler_level=True
+    )
+    listener.start()
+    # Flush whatever is still queued when the CLI exits (logging's own shutdown
+    # runs after this and closes the buffer, writing out its last records)
+    atexit.register(listener.stop)
+    
+    def flush_periodically():
+        while True:
+            time.sleep(LOG_FLUSH_SECONDS)
+            buffered_file_handler.flush()
+    
+    threading.Thread(target=flush_periodically, name='log-flush', daemon=True).start()
+    
+    logger.setLevel(os.getenv('LOG_LEVEL', 'INFO').upper())
+    logger.addHandler(DeferredQueueHandler(log_queue))
     
     return logger
 
 # Global logger instance
 logger = setup_logging()
 
+# Validators log through their own logger so routine "validated" lines can be
+# silenced (VALIDATION_LOG_LEVEL=WARNING) without touching order logs
+validation_logger = logging.getLogger('validation')
+validation_logger.setLevel(os.getenv('VALIDATION_LOG_LEVEL', 'INFO').upper())
+
+# Bound once; the validators and log_order run on every order
+_log_info = logger.info
+_log_error = logger.error
+_log_validated = validation_logger.info
+
 def validate_symbol(symbol):
     """
     Validate trading symbol format for USDT-M futures
@@ -40,25 +155,32 @@ def validate_symbol(symbol):
     Raises:
         ValueError: If symbol format is invalid
     """
+    # Type check before the cache, so unhashable input is a ValueError too
     if not symbol or not isinstance(symbol, str):
         raise ValueError("Symbol must be a non-empty string")
     
+    return _validate_symbol(symbol)
+
+# The same few symbols are validated over and over, so each is checked (and logged) once
+@functools.lru_cache(maxsize=256)
+def _validate_symbol(symbol):
+    """Format checks for validate_symbol, on a non-empty string"""
     symbol = symbol.upper().strip()
     
     # Check if symbol ends with USDT (for USDT-M futures)
     if not symbol.endswith('USDT'):
         raise ValueError(f"Invalid symbol format: {symbol}. Must end with USDT for futures trading")
     
-    # Check if symbol has valid characters
-    pattern = r'^[A-Z0-9]+USDT$'
-    if not re.match(pattern, symbol):
+    # Check if symbol has valid characters (plain string checks, no regex engine)
+    base = symbol[:-4]
+    if not (base.isascii() and base.isalnum()):
         raise ValueError(f"Invalid symbol format: {symbol}. Must contain only letters and numbers")
     
     # Check minimum length
-    if len(symbol) < 6:  # At least 2 chars + USDT
+    if len(base) < 2:  # At least 2 chars + USDT
         raise ValueError(f"Symbol too short: {symbol}")
     
-    logger.info(f"Symbol validated: {symbol}")
+    _log_validated("Symbol validated: %s", symbol)
     return symbol
 
 def validate_quantity(quantity):
@@ -72,7 +194,8 @@ def validate_quantity(quantity):
         ValueError: If quantity is invalid
     """
     try:
-        qty = float(quantity)
+        # Internal callers already pass floats; only strings and ints need converting
+        qty = quantity if type(quantity) is float else float(quantity)
     except (ValueError, TypeError):
         raise ValueError(f"Invalid quantity format: {quantity}. Must be a number")
     
@@ -80,13 +203,13 @@ def validate_quantity(quantity):
         raise ValueError(f"Quantity must be positive, got: {qty}")
     
     # Check for reasonable limits
-    if qty > 1000000:
-        raise ValueError(f"Quantity too large: {qty}. Maximum allowed: 1,000,000")
+    if qty > MAX_QUANTITY:
+        raise ValueError(f"Quantity too large: {qty}. Maximum allowed: {MAX_QUANTITY:,}")
     
-    if qty < 0.001:
-        raise ValueError(f"Quantity too small: {qty}. Minimum allowed: 0.001")
+    if qty < MIN_QUANTITY:
+        raise ValueError(f"Quantity too small: {qty}. Minimum allowed: {MIN_QUANTITY}")
     
-    logger.info(f"Quantity validated: {qty}")
+    _log_validated("Quantity validated: %s", qty)
     return qty
 
 def validate_price(price):
@@ -100,7 +223,7 @@ def validate_price(price):
         ValueError: If price is invalid
     """
     try:
-        p = float(price)
+        p = price if type(price) is float else float(price)
     except (ValueError, TypeError):
         raise ValueError(f"Invalid price format: {price}. Must be a number")
     
@@ -108,10 +231,10 @@ def validate_price(price):
         raise ValueError(f"Price must be positive, got: {p}")
     
     # Check for reasonable limits
-    if p > 10000000:
-        raise ValueError(f"Price too high: {p}. Maximum allowed: 10,000,000")
+    if p > MAX_PRICE:
+        raise ValueError(f"Price too high: {p}. Maximum allowed: {MAX_PRICE:,}")
     
-    logger.info(f"Price validated: {p}")
+    _log_validated("Price validated: %s", p)
     return p
 
 def validate_side(side):
@@ -127,12 +250,17 @@ def validate_side(side):
     if not side or not isinstance(side, str):
         raise ValueError("Side must be a non-empty string")
     
+    return _validate_side(side)
+
+@functools.lru_cache(maxsize=16)
+def _validate_side(side):
+    """Value check for validate_side, on a non-empty string"""
     side = side.upper().strip()
     
     if side not in ['BUY', 'SELL']:
         raise ValueError(f"Invalid side: {side}. Must be BUY or SELL")
     
-    logger.info(f"Side validated: {side}")
+    _log_validated("Side validated: %s", side)
     return side
 
 def log_order(action, symbol, side, quantity, price=None, order_id=None, status="PENDING", error=None):
@@ -148,23 +276,34 @@ def log_order(action, symbol, side, quantity, price=None, order_id=None, status=
         status (str): Order status
         error (str, optional): Error message if any
     """
-    timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-    
-    message = f"Action: {action} | Symbol: {symbol} | Side: {side} | Qty: {quantity}"
+    # %-style args: nothing is formatted unless the record passes the level check
+    # (the log record carries its own timestamp). The same fields ride along
+    # on the record as a dict for the JSON formatter.
+    fmt = "Action: %s | Symbol: %s | Side: %s | Qty: %s"
+    args = [action, symbol, side, quantity]
+    payload = {'action': action, 'symbol': symbol, 'side': side, 'qty': quantity}
     
     if price is not None:
-        message += f" | Price: {price}"
+        fmt += " | Price: %s"
+        args.append(price)
+        payload['price'] = price
     
     if order_id:
-        message += f" | OrderID: {order_id}"
+        fmt += " | OrderID: %s"
+        args.append(order_id)
+        payload['order_id'] = order_id
     
-    message += f" | Status: {status}"
+    fmt += " | Status: %s"
+    args.append(status)
+    payload['status'] = status
     
     if error:
-        message += f" | Error: {error}"
-        logger.error(message)
+        fmt += " | Error: %s"
+        args.append(error)
+        payload['error'] = error
+        _log_error(fmt, *args, extra={'order': payload})
     else:
-        logger.info(message)
+        _log_info(fmt, *args, extra={'order': payload})
 
 def handle_api_error(e, action="API_CALL"):
     """
@@ -178,22 +317,50 @@ def handle_api_error(e, action="API_CALL"):
     error_msg = str(e)
     
     # Extract meaningful error from Binance API error
-    if hasattr(e, 'response'):
+    content = getattr(getattr(e, 'response', None), 'content', None)
+    if content:
         try:
-            error_details = e.response.json()
+            # Raw body straight to from_json (orjson when installed), no requests decoding
+            error_details = from_json(content)
             if 'msg' in error_details:
                 error_msg = error_details['msg']
-        except:
-            pass
+        except (TypeError, ValueError):  # ValueError covers json/orjson decode errors
+            pass  # Not a JSON object body; keep str(e)
     
     full_error = f"{action} failed: {error_msg}"
     
-    # Log full stack trace for debugging
-    logger.error(f"{full_error}")
-    logger.error(f"Stack trace: {traceback.format_exc()}")
+    # The stack trace is only formatted when DEBUG logging is on (LOG_LEVEL=DEBUG);
+    # passing the exception itself also works when called outside its except block
+    logger.error("%s", full_error, exc_info=e if logger.isEnabledFor(logging.DEBUG) else None)
     
     return full_error
 
+def to_json(obj):
+    """
+    Encode request parameters (e.g. batchOrders) as compact JSON
+    Args:
+        obj: List or dict to encode
+    Returns:
+        str: JSON without whitespace, using orjson when it is installed
+    """
+    if orjson is not None:
+        return orjson.dumps(obj).decode()
+    return json.dumps(obj, separators=(',', ':'))
+
+def from_json(data):
+    """
+    Decode a JSON response body or websocket frame
+    Args:
+        data (str or bytes): Raw JSON
+    Returns:
+        Decoded object, using orjson when it is installed
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+# Grid levels repeat constantly, so each distinct value is formatted once
+@functools.lru_cache(maxsize=512)
 def format_number(number, decimal_places=8):
     """
     Format number for display
@@ -205,16 +372,117 @@ def format_number(number, decimal_places=8):
     """
     try:
         return f"{float(number):.{decimal_places}f}".rstrip('0').rstrip('.')
-    except:
+    except (TypeError, ValueError):
         return str(number)
 
+# Parsed exchange filters are shared between runs through a small disk cache
+SYMBOL_FILTERS_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'binance_bot')
+SYMBOL_FILTERS_TTL = 24 * 60 * 60  # seconds
+
+def _parse_symbol_filters(symbol_info):
+    """Pull the order filters out of one exchange info symbol entry"""
+    filters = {f['filterType']: f for f in symbol_info['filters']}
+    tick_size = filters['PRICE_FILTER']['tickSize']
+    step_size = filters['LOT_SIZE']['stepSize']
+    
+    return {
+        'tickSize': float(tick_size),
+        'stepSize': float(step_size),
+        'minQty': float(filters['LOT_SIZE']['minQty']),
+        'minNotional': float(filters.get('MIN_NOTIONAL', {}).get('notional', 0)),
+        # Decimal places of the tick/step, used to print clean quantized values
+        'priceDecimals': len(tick_size.rstrip('0').partition('.')[2]),
+        'quantityDecimals': len(step_size.rstrip('0').partition('.')[2])
+    }
+
+def _symbol_filters_path(client):
+    """Cache file for the client's environment (testnet filters differ from live)"""
+    name = 'symbol_filters_testnet.json' if getattr(client, 'testnet', False) else 'symbol_filters.json'
+    return os.path.join(SYMBOL_FILTERS_CACHE_DIR, name)
+
+def _load_symbol_filters(path):
+    """Read cached filters, or None if the file is missing, unreadable or stale"""
+    try:
+        with open(path, 'rb') as f:
+            cached = from_json(f.read())
+    except (OSError, ValueError):
+        return None
+    
+    if not isinstance(cached, dict) or not isinstance(cached.get('symbols'), dict):
+        return None  # Valid JSON but not a cache file
+    if time.time() - cached.get('fetched_at', 0) > SYMBOL_FILTERS_TTL:
+        return None
+    return cached.get('symbols')
+
+def _save_symbol_filters(path, all_filters):
+    """Write filters to the cache file; failing to cache is not an error"""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(tmp_path, 'w') as f:
+            f.write(to_json({'fetched_at': time.time(), 'symbols': all_filters}))
+        os.replace(tmp_path, path)  # Atomic, so a concurrent reader never sees half a file
+    except OSError as e:
+        logger.warning("Could not cache symbol filters: %s", e)
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+
+@functools.lru_cache(maxsize=None)
+def get_symbol_filters(client, symbol):
+    """
+    Get price/quantity filters for a symbol
+    Exchange info is fetched at most once a day; in between the parsed
+    filters come from memory or the disk cache.
+    Args:
+        client: Binance client
+        symbol (str): Trading symbol
+    Returns:
+        dict: tickSize, stepSize, minQty, minNotional as floats plus
+              priceDecimals and quantityDecimals
+    """
+    path = _symbol_filters_path(client)
+    all_filters = _load_symbol_filters(path)
+    
+    # A symbol missing from the cache may have been listed since, so refetch
+    if all_filters is None or symbol not in all_filters:
+        exchange_info = client.futures_exchange_info()
+        all_filters = {
+            symbol_info['symbol']: _parse_symbol_filters(symbol_info)
+            for symbol_info in exchange_info['symbols']
+        }
+        _save_symbol_filters(path, all_filters)
+    
+    if symbol not in all_filters:
+        raise ValueError(f"Symbol {symbol} not found in exchange info")
+    return all_filters[symbol]
+
+def round_down_to_step(value, step, decimals):
+    """
+    Round a price or quantity down to a multiple of its tick or lot step
+    Args:
+        value (float): Price or quantity
+        step (float): tickSize or stepSize from get_symbol_filters
+        decimals (int): priceDecimals or quantityDecimals for the step
+    Returns:
+        float: Largest step multiple not above value
+    """
+    # The epsilon keeps exact multiples whose float division lands just under
+    # the integer (0.3 / 0.1 == 2.9999999999999996) from losing a step
+    return round(math.floor(value / step + 1e-9) * step, decimals)
+
 def confirm_action(message):
     """
     Ask user for confirmation
+    Set BOT_ASSUME_YES=1 to confirm without prompting (unattended runs).
     Args:
         message (str): Confirmation message
     Returns:
         bool: True if user confirms, False otherwise
     """
+    if os.getenv('BOT_ASSUME_YES') == '1':
+        return True
+    
     response = input(f"{message} (y/N): ").strip().lower()
     return response in ['y', 'yes']
\ No newline at end of file
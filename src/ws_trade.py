@@ -0,0 +1,352 @@
+# src/ws_trade.py
+"""
+Binance Futures WebSocket API Trading Client
+Places and cancels orders as JSON-RPC frames over one persistent, signed
+connection instead of a separate HTTPS request per order. Falls back to
+REST when the socket is unavailable or slow to answer.
+"""
+
+import hashlib
+import hmac
+import itertools
+import threading
+import time
+import uuid
+from concurrent.futures import Future
+
+from config import Config
+from utils import logger, to_json, from_json
+
+WS_API_URL = 'wss://ws-fapi.binance.com/ws-fapi/v1'
+WS_API_TESTNET_URL = 'wss://testnet.binancefuture.com/ws-fapi/v1'
+
+# Seconds to wait for a WebSocket API answer before retrying over REST
+WS_TIMEOUT_SECONDS = 2
+
+# Sent explicitly on every request: a frame reaching the server later than
+# timestamp + recvWindow is rejected rather than executed
+WS_RECV_WINDOW_MS = 5000
+
+# The server refuses timestamps more than 1s ahead of its clock, which bounds how
+# far a fast local clock can stretch the window
+WS_CLOCK_MARGIN_SECONDS = 1.0
+
+# REST error code for a newClientOrderId that is already in use (open orders only)
+DUPLICATE_CLIENT_ORDER_ID = -4116
+
+# REST error code for an order lookup that matches nothing
+ORDER_DOES_NOT_EXIST = -2013
+
+class BinanceOrderError(Exception):
+    """Order request rejected by the exchange"""
+
+    def __init__(self, code, msg):
+        super().__init__(f"APIError(code={code}): {msg}")
+        self.code = code
+        self.msg = msg
+
+class WSTradeClient:
+    """Persistent authenticated connection to the futures WebSocket API"""
+
+    def __init__(self, api_key, api_secret, testnet=True):
+        self.api_key = api_key
+        # Keyed once; each request signs from a copy
+        self._base_hmac = hmac.new(api_secret.encode(), digestmod=hashlib.sha256)
+        self.url = WS_API_TESTNET_URL if testnet else WS_API_URL
+        self._conn = None
+        self._pending = {}  # request id -> Future, for the current connection
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def order_place(self, params):
+        """
+        Send an order.place request
+        Args:
+            params (dict): Order parameters, same names as futures_create_order
+        Returns:
+            Future: Resolves to the order response; its expires_at is the
+                time.monotonic() after which the server can no longer accept it
+        Raises:
+            Exception: If the request could not be sent at all
+        """
+        return self._request('order.place', params)
+
+    def order_cancel(self, params):
+        """
+        Send an order.cancel request
+        Args:
+            params (dict): symbol plus orderId or origClientOrderId
+        Returns:
+            Future: Resolves to the cancelled order response
+        """
+        return self._request('order.cancel', params)
+
+    def _request(self, method, params):
+        """Sign and send a request, returning a Future for its response"""
+        params = _format_params(params)
+        params['apiKey'] = self.api_key
+        params.setdefault('recvWindow', str(WS_RECV_WINDOW_MS))
+        params['timestamp'] = int(time.time() * 1000)
+        expires_at = time.monotonic() + int(params['recvWindow']) / 1000 + WS_CLOCK_MARGIN_SECONDS
+
+        payload = '&'.join(f"{key}={value}" for key, value in sorted(params.items()))
+        mac = self._base_hmac.copy()
+        mac.update(payload.encode())
+        params['signature'] = mac.hexdigest()
+
+        future = Future()
+        future.expires_at = expires_at
+        with self._lock:
+            conn = self._connect()
+            request_id = next(self._ids)
+            self._pending[request_id] = future
+            try:
+                conn.send(to_json({'id': request_id, 'method': method, 'params': params}))
+            except Exception as e:
+                # Raised rather than set on the future: an unsent request is safe to retry
+                del self._pending[request_id]
+                raise ConnectionError(f"WebSocket API send failed: {e}")
+
+        return future
+
+    def reset(self):
+        """
+        Drop the current connection after a request went unanswered
+        Its pending requests fail at once, and later requests use a fresh
+        connection instead of queueing behind a stalled one.
+        """
+        with self._lock:
+            conn, self._conn = self._conn, None
+        if conn is not None:
+            conn.close()  # The read loop fails whatever is still pending
+
+    def _connect(self):
+        """Open the connection if needed (caller holds the lock)"""
+        if self._conn is None:
+            from websockets.sync.client import connect
+
+            self._conn = connect(self.url, open_timeout=WS_TIMEOUT_SECONDS,
+                                 close_timeout=WS_TIMEOUT_SECONDS)
+            self._pending = {}
+            threading.Thread(
+                target=self._read_loop, args=(self._conn, self._pending), daemon=True
+            ).start()
+            logger.info("WebSocket API trading connection opened")
+        return self._conn
+
+    def _read_loop(self, conn, pending):
+        """Resolve pending requests from responses until the connection closes"""
+        try:
+            for raw in conn:
+                msg = from_json(raw)
+                future = pending.pop(msg.get('id'), None)
+                if future is None:
+                    continue
+
+                if msg.get('status') == 200:
+                    future.set_result(msg['result'])
+                else:
+                    error = msg.get('error', {})
+                    future.set_exception(BinanceOrderError(error.get('code'), error.get('msg')))
+        except Exception as e:
+            logger.warning("WebSocket API connection lost: %s", e)
+        finally:
+            with self._lock:
+                if self._conn is conn:
+                    self._conn = None
+            # Anything still waiting will never be answered on this connection
+            for future in list(pending.values()):
+                future.set_exception(ConnectionError("WebSocket API connection closed"))
+            pending.clear()
+
+def _format_params(params):
+    """Send every value as a string so the signed payload matches what the server parses"""
+    return {key: str(value).lower() if isinstance(value, bool) else str(value)
+            for key, value in params.items()}
+
+def new_client_order_id():
+    """Unique newClientOrderId, so an order retried over REST can be recognised"""
+    return f"ws_{uuid.uuid4().hex[:24]}"
+
+_ws_trade_client = None
+_ws_trade_lock = threading.Lock()
+
+def get_ws_trade_client():
+    """
+    Get the shared WebSocket API client
+    Returns:
+        WSTradeClient: Client using the configured credentials
+    """
+    global _ws_trade_client
+
+    with _ws_trade_lock:
+        if _ws_trade_client is None:
+            if not Config.API_KEY or not Config.SECRET_KEY:
+                raise ValueError("API credentials not found. Please check your .env file")
+            _ws_trade_client = WSTradeClient(Config.API_KEY, Config.SECRET_KEY, Config.USE_TESTNET)
+
+    return _ws_trade_client
+
+def _find_order(client, params, expires_at):
+    """
+    Look up an order that was sent but never answered
+    Binance only rejects a reused newClientOrderId while that order is open,
+    so a resend of an order that already filled (any MARKET order) would
+    trade twice. A lookup made while the frame could still arrive proves
+    nothing, so wait until its recvWindow has passed: from then on the
+    server rejects it, and "no such order" means it will never exist.
+    Args:
+        client: Binance REST client
+        params (dict): Order parameters including newClientOrderId
+        expires_at (float): time.monotonic() after which the request is void
+    Returns:
+        dict: The order, or None if the exchange has no order with that id
+    """
+    from binance.exceptions import BinanceAPIException
+
+    wait = expires_at - time.monotonic()
+    if wait > 0:
+        time.sleep(wait)
+
+    try:
+        return client.futures_get_order(symbol=params['symbol'],
+                                        origClientOrderId=params['newClientOrderId'])
+    except BinanceAPIException as e:
+        if e.code != ORDER_DOES_NOT_EXIST:
+            raise  # Outcome unknown: better a reported failure than a double fill
+    return None
+
+def create_order(client, **params):
+    """
+    Place an order over the WebSocket API, falling back to REST
+    Args:
+        client: Binance REST client used for the fallback
+        **params: Order parameters, as for futures_create_order
+    Returns:
+        dict: Order response
+    """
+    # A fixed client order id lets an unanswered WebSocket order be looked up
+    params.setdefault('newClientOrderId', new_client_order_id())
+
+    try:
+        ws = get_ws_trade_client()
+        future = ws.order_place(params)
+    except Exception as e:
+        logger.warning("WebSocket order.place unavailable (%r), using REST", e)
+    else:
+        try:
+            return future.result(timeout=WS_TIMEOUT_SECONDS)
+        except BinanceOrderError:
+            raise  # Rejected by the exchange, REST would be rejected too
+        except Exception as e:
+            logger.warning("WebSocket order.place unanswered (%r), checking the order over REST", e)
+            ws.reset()
+            order = _find_order(client, params, future.expires_at)
+            if order is not None:
+                return order
+
+    from binance.exceptions import BinanceAPIException
+
+    try:
+        return client.futures_create_order(**params)
+    except BinanceAPIException as e:
+        if e.code != DUPLICATE_CLIENT_ORDER_ID:
+            raise
+        return client.futures_get_order(symbol=params['symbol'],
+                                        origClientOrderId=params['newClientOrderId'])
+
+def create_orders(client, orders):
+    """
+    Place several orders at once
+    Requests are pipelined over the WebSocket API; any that cannot be sent,
+    or that go unanswered and turn out not to exist, go to REST together as
+    one batchOrders request.
+    Args:
+        client: Binance REST client used for the fallback
+        orders (list): Order parameter dicts, at most 5
+    Returns:
+        list: Order response or exception for each order, in request order
+    """
+    orders = [dict(params) for params in orders]
+    for params in orders:
+        params.setdefault('newClientOrderId', new_client_order_id())
+
+    results = [None] * len(orders)
+
+    futures = []
+    try:
+        ws = get_ws_trade_client()
+        for params in orders:
+            futures.append(ws.order_place(params))
+    except Exception as e:
+        logger.warning("WebSocket order.place unavailable (%r), using REST", e)
+
+    # Orders that were never sent are safe to send over REST
+    retry = list(range(len(futures), len(orders)))
+
+    deadline = time.monotonic() + WS_TIMEOUT_SECONDS
+    for index, future in enumerate(futures):
+        try:
+            results[index] = future.result(timeout=max(0, deadline - time.monotonic()))
+        except BinanceOrderError as e:
+            results[index] = e
+        except Exception as e:
+            logger.warning("WebSocket order.place unanswered (%r), checking the order over REST", e)
+            ws.reset()  # Later futures of this batch fail at once instead of timing out
+            try:
+                order = _find_order(client, orders[index], future.expires_at)
+            except Exception as e:
+                results[index] = e
+                continue
+            if order is None:
+                retry.append(index)
+            else:
+                results[index] = order
+
+    retry.sort()
+
+    if not retry:
+        return results
+
+    try:
+        response = client.futures_place_batch_order(
+            batchOrders=to_json([_format_params(orders[index]) for index in retry])
+        )
+    except Exception as e:
+        for index in retry:
+            results[index] = e
+        return results
+
+    # Batch results come back in request order; rejected entries carry code/msg
+    for index, result in zip(retry, response):
+        if 'orderId' in result:
+            results[index] = result
+        elif result.get('code') == DUPLICATE_CLIENT_ORDER_ID:
+            try:
+                results[index] = client.futures_get_order(
+                    symbol=orders[index]['symbol'], origClientOrderId=orders[index]['newClientOrderId']
+                )
+            except Exception as e:
+                results[index] = e
+        else:
+            results[index] = BinanceOrderError(result.get('code'), result.get('msg'))
+
+    return results
+
+def cancel_order(client, **params):
+    """
+    Cancel an order over the WebSocket API, falling back to REST
+    Args:
+        client: Binance REST client used for the fallback
+        **params: symbol plus orderId or origClientOrderId
+    Returns:
+        dict: Cancelled order response
+    """
+    try:
+        return get_ws_trade_client().order_cancel(params).result(timeout=WS_TIMEOUT_SECONDS)
+    except BinanceOrderError:
+        raise
+    except Exception as e:
+        logger.warning("WebSocket order.cancel unavailable (%r), using REST", e)
+
+    return client.futures_cancel_order(**params)
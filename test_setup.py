@@ -1,6 +1,12 @@
 # test_setup.py
-from src.config import Config
-from src.utils import validate_symbol, validate_quantity, logger
+import os
+import sys
+
+# Modules in src/ import each other by bare name, as the CLIs do
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+from config import Config
+from utils import validate_symbol, validate_quantity, logger
 
 def test_setup():
     print("Testing project setup...")
@@ -0,0 +1,12 @@
+# tests/conftest.py
+import os
+import sys
+import tempfile
+
+# Modules in src/ import each other by bare name, as the CLIs do
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+sys.path[:0] = [SRC_DIR, os.path.join(SRC_DIR, 'advanced')]
+
+# utils opens bot.log in the working directory on import; keep test runs out of the real log
+os.environ.setdefault('BOT_LOG_STDOUT', '0')
+os.chdir(tempfile.mkdtemp(prefix='binance_bot_tests_'))
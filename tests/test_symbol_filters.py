@@ -0,0 +1,121 @@
+# tests/test_symbol_filters.py
+import json
+import os
+import time
+
+import pytest
+
+import utils
+from utils import get_symbol_filters, round_down_to_step
+
+def exchange_symbol(symbol, tick_size, step_size, min_qty='0.001'):
+    """One futures_exchange_info symbol entry"""
+    return {'symbol': symbol, 'filters': [
+        {'filterType': 'PRICE_FILTER', 'tickSize': tick_size},
+        {'filterType': 'LOT_SIZE', 'stepSize': step_size, 'minQty': min_qty},
+        {'filterType': 'MIN_NOTIONAL', 'notional': '5'},
+    ]}
+
+class StubClient:
+    """Counts exchange info requests"""
+
+    def __init__(self, testnet=False, symbols=None):
+        self.testnet = testnet
+        self.symbols = symbols or [exchange_symbol('BTCUSDT', '0.10', '0.001')]
+        self.fetches = 0
+
+    def futures_exchange_info(self):
+        self.fetches += 1
+        return {'symbols': self.symbols}
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(utils, 'SYMBOL_FILTERS_CACHE_DIR', str(tmp_path))
+    get_symbol_filters.cache_clear()
+    yield tmp_path
+    get_symbol_filters.cache_clear()
+
+def write_cache(path, fetched_at, symbols):
+    path.write_text(json.dumps({'fetched_at': fetched_at, 'symbols': symbols}))
+
+@pytest.mark.parametrize('value, step, decimals, expected', [
+    (0.0509, 0.001, 3, 0.05),
+    (0.016666, 0.001, 3, 0.016),
+    (1.0, 0.001, 3, 1.0),
+    (0.3, 0.1, 1, 0.3),  # 0.3 / 0.1 is 2.9999999999999996 in floats
+    (0.7, 0.1, 1, 0.7),
+    (44999.99, 0.1, 1, 44999.9),
+    (2.5, 1, 0, 2),
+    (10, 1, 0, 10),
+    (0.0009, 0.001, 3, 0.0),
+])
+def test_round_down_to_step(value, step, decimals, expected):
+    assert round_down_to_step(value, step, decimals) == expected
+
+def test_round_down_to_step_never_rounds_up():
+    for hundredths in range(1, 1000):
+        value = hundredths / 100
+        assert round_down_to_step(value, 0.1, 1) <= value + 1e-12
+
+def test_filters_parsed_and_cached_on_disk(cache_dir):
+    client = StubClient()
+
+    filters = get_symbol_filters(client, 'BTCUSDT')
+
+    assert filters == {
+        'tickSize': 0.1, 'stepSize': 0.001, 'minQty': 0.001, 'minNotional': 5.0,
+        'priceDecimals': 1, 'quantityDecimals': 3,
+    }
+    assert client.fetches == 1
+    assert os.listdir(cache_dir) == ['symbol_filters.json']  # No temp file left behind
+
+    # A new process (empty lru_cache) reads the file instead of refetching
+    get_symbol_filters.cache_clear()
+    other = StubClient()
+    assert get_symbol_filters(other, 'BTCUSDT') == filters
+    assert other.fetches == 0
+
+def test_testnet_filters_use_their_own_file(cache_dir):
+    get_symbol_filters(StubClient(testnet=True), 'BTCUSDT')
+    assert os.listdir(cache_dir) == ['symbol_filters_testnet.json']
+
+    live = StubClient(symbols=[exchange_symbol('BTCUSDT', '0.01', '0.0001')])
+    assert get_symbol_filters(live, 'BTCUSDT')['tickSize'] == 0.01
+    assert live.fetches == 1
+    assert sorted(os.listdir(cache_dir)) == ['symbol_filters.json', 'symbol_filters_testnet.json']
+
+def test_stale_cache_is_refetched(cache_dir):
+    stale = {'BTCUSDT': {'tickSize': 1.0}}
+    write_cache(cache_dir / 'symbol_filters.json', time.time() - utils.SYMBOL_FILTERS_TTL - 1, stale)
+    client = StubClient()
+
+    assert get_symbol_filters(client, 'BTCUSDT')['tickSize'] == 0.1
+    assert client.fetches == 1
+    assert json.loads((cache_dir / 'symbol_filters.json').read_text())['symbols']['BTCUSDT']['tickSize'] == 0.1
+
+def test_fresh_cache_missing_symbol_is_refetched(cache_dir):
+    write_cache(cache_dir / 'symbol_filters.json', time.time(), {'ETHUSDT': {'tickSize': 0.01}})
+    client = StubClient()
+
+    assert get_symbol_filters(client, 'BTCUSDT')['tickSize'] == 0.1
+    assert client.fetches == 1
+
+@pytest.mark.parametrize('content', [b'{"fetched_at": 1', b'', b'[]', b'{"fetched_at": 0}', b'\xff\xfe'])
+def test_corrupt_cache_is_refetched(cache_dir, content):
+    (cache_dir / 'symbol_filters.json').write_bytes(content)
+    client = StubClient()
+
+    assert get_symbol_filters(client, 'BTCUSDT')['stepSize'] == 0.001
+    assert client.fetches == 1
+
+def test_failed_cache_write_is_not_an_error(cache_dir, monkeypatch):
+    def fail(src, dst):
+        raise OSError("disk full")
+    monkeypatch.setattr(utils.os, 'replace', fail)
+
+    assert get_symbol_filters(StubClient(), 'BTCUSDT')['tickSize'] == 0.1
+    assert os.listdir(cache_dir) == []  # Neither the cache nor its temp file
+
+def test_unknown_symbol_raises(cache_dir):
+    with pytest.raises(ValueError):
+        get_symbol_filters(StubClient(), 'NOPEUSDT')
@@ -0,0 +1,28 @@
+# tests/test_twap.py
+import pytest
+
+from twap import split_twap_quantity
+
+@pytest.mark.parametrize('total, orders, step, decimals, expected', [
+    (10, 4, 1, 0, [2, 2, 3, 3]),
+    (0.05, 3, 0.001, 3, [0.016, 0.017, 0.017]),
+    (1.0, 7, 0.001, 3, [0.142] + [0.143] * 6),
+    (0.3, 3, 0.1, 1, [0.1, 0.1, 0.1]),
+    (0.7, 3, 0.1, 1, [0.2, 0.2, 0.3]),
+])
+def test_split_spreads_extra_steps(total, orders, step, decimals, expected):
+    quantities, unplaced = split_twap_quantity(total, orders, step, decimals)
+
+    assert quantities == expected
+    assert max(quantities) - min(quantities) <= step + 1e-12
+    assert unplaced == 0
+
+def test_split_never_trades_more_than_asked():
+    quantities, unplaced = split_twap_quantity(0.0505, 3, 0.001, 3)
+
+    assert quantities == [0.016, 0.017, 0.017]
+    assert unplaced == pytest.approx(0.0005)
+
+def test_split_below_one_step_per_order():
+    quantities, _ = split_twap_quantity(0.002, 3, 0.001, 3)
+    assert quantities == [0.0, 0.001, 0.001]
@@ -0,0 +1,219 @@
+# tests/test_ws_trade.py
+import hashlib
+import hmac
+import json
+import time
+from concurrent.futures import Future
+
+import pytest
+from binance.exceptions import BinanceAPIException
+
+import ws_trade
+from ws_trade import BinanceOrderError
+
+def api_error(code):
+    """BinanceAPIException as python-binance raises it for an error body"""
+    return BinanceAPIException(None, 400, json.dumps({'code': code, 'msg': f"error {code}"}))
+
+class FakeConnection:
+    """Records frames instead of sending them"""
+
+    def __init__(self):
+        self.sent = []
+
+    def send(self, frame):
+        self.sent.append(json.loads(frame))
+
+class FakeWSClient:
+    """Stands in for WSTradeClient; each order gets the next scripted outcome"""
+
+    def __init__(self, outcomes, expires_in=0.05):
+        self.outcomes = list(outcomes)
+        self.expires_in = expires_in
+        self.sent = []
+        self.resets = 0
+
+    def order_place(self, params):
+        outcome = self.outcomes.pop(0)
+        if outcome == 'unsent':
+            raise ConnectionError("WebSocket API send failed")
+        self.sent.append(params)
+        future = Future()
+        future.expires_at = time.monotonic() + self.expires_in
+        if isinstance(outcome, Exception):
+            future.set_exception(outcome)
+        elif outcome != 'unanswered':
+            future.set_result(outcome)
+        return future
+
+    def reset(self):
+        self.resets += 1
+
+class StubClient:
+    """REST client stub; lookups return `found` or raise -2013"""
+
+    def __init__(self, found=None, lookup_error=None, create_error=None, batch_response=None):
+        self.found = found
+        self.lookup_error = lookup_error
+        self.create_error = create_error
+        self.batch_response = batch_response
+        self.calls = []
+
+    def futures_get_order(self, **params):
+        self.calls.append(('get', params, time.monotonic()))
+        if self.lookup_error is not None:
+            raise self.lookup_error
+        if self.found is None:
+            raise api_error(ws_trade.ORDER_DOES_NOT_EXIST)
+        return self.found
+
+    def futures_create_order(self, **params):
+        self.calls.append(('create', params, time.monotonic()))
+        if self.create_error is not None:
+            raise self.create_error
+        return {'orderId': 1, 'status': 'NEW', 'clientOrderId': params['newClientOrderId']}
+
+    def futures_place_batch_order(self, **params):
+        self.calls.append(('batch', params, time.monotonic()))
+        return self.batch_response(json.loads(params['batchOrders']))
+
+    def names(self):
+        return [name for name, _, _ in self.calls]
+
+@pytest.fixture
+def use_ws(monkeypatch):
+    def install(ws):
+        monkeypatch.setattr(ws_trade, 'get_ws_trade_client', lambda: ws)
+        return ws
+    return install
+
+MARKET = {'symbol': 'BTCUSDT', 'side': 'BUY', 'type': 'MARKET', 'quantity': '0.01'}
+
+def test_format_params_sends_strings():
+    assert ws_trade._format_params({'quantity': 0.01, 'reduceOnly': True, 'closePosition': False}) == {
+        'quantity': '0.01', 'reduceOnly': 'true', 'closePosition': 'false'
+    }
+
+def test_request_signs_sorted_payload():
+    client = ws_trade.WSTradeClient('key', 'secret')
+    client._conn = FakeConnection()
+
+    future = client.order_place({'symbol': 'BTCUSDT', 'side': 'BUY', 'quantity': 0.01, 'reduceOnly': False})
+    params = client._conn.sent[0]['params']
+
+    assert client._conn.sent[0]['method'] == 'order.place'
+    assert params['apiKey'] == 'key'
+    assert params['recvWindow'] == str(ws_trade.WS_RECV_WINDOW_MS)
+    assert params['reduceOnly'] == 'false'
+    signature = params.pop('signature')
+    payload = '&'.join(f"{key}={value}" for key, value in sorted(params.items()))
+    assert signature == hmac.new(b'secret', payload.encode(), hashlib.sha256).hexdigest()
+    assert future.expires_at > time.monotonic() + ws_trade.WS_RECV_WINDOW_MS / 1000
+
+def test_request_keeps_caller_recv_window():
+    client = ws_trade.WSTradeClient('key', 'secret')
+    client._conn = FakeConnection()
+
+    client.order_place({'symbol': 'BTCUSDT', 'recvWindow': 1000})
+    assert client._conn.sent[0]['params']['recvWindow'] == '1000'
+
+def test_create_order_returns_websocket_answer(use_ws):
+    use_ws(FakeWSClient([{'orderId': 7, 'status': 'FILLED'}]))
+    client = StubClient()
+
+    assert ws_trade.create_order(client, **MARKET)['orderId'] == 7
+    assert client.calls == []
+
+def test_create_order_reraises_exchange_rejection(use_ws):
+    use_ws(FakeWSClient([BinanceOrderError(-2019, "Margin is insufficient")]))
+    client = StubClient()
+
+    with pytest.raises(BinanceOrderError):
+        ws_trade.create_order(client, **MARKET)
+    assert client.calls == []
+
+def test_create_order_unsent_goes_straight_to_rest(use_ws):
+    use_ws(FakeWSClient(['unsent']))
+    client = StubClient()
+
+    assert ws_trade.create_order(client, **MARKET)['status'] == 'NEW'
+    assert client.names() == ['create']
+
+def test_create_order_unanswered_resends_after_window(use_ws, monkeypatch):
+    monkeypatch.setattr(ws_trade, 'WS_TIMEOUT_SECONDS', 0.01)
+    ws = use_ws(FakeWSClient(['unanswered']))
+    client = StubClient()
+
+    order = ws_trade.create_order(client, **MARKET)
+
+    assert client.names() == ['get', 'create']
+    assert ws.resets == 1
+    # The resend reuses the client order id the WebSocket request carried
+    assert order['clientOrderId'] == ws.sent[0]['newClientOrderId']
+
+def test_create_order_unanswered_lookup_waits_for_expiry(use_ws, monkeypatch):
+    monkeypatch.setattr(ws_trade, 'WS_TIMEOUT_SECONDS', 0.01)
+    use_ws(FakeWSClient(['unanswered'], expires_in=0.2))
+    client = StubClient()
+
+    started = time.monotonic()
+    ws_trade.create_order(client, **MARKET)
+
+    _, _, looked_up_at = client.calls[0]
+    assert looked_up_at - started >= 0.2
+
+def test_create_order_unanswered_but_placed_is_not_resent(use_ws, monkeypatch):
+    monkeypatch.setattr(ws_trade, 'WS_TIMEOUT_SECONDS', 0.01)
+    use_ws(FakeWSClient(['unanswered']))
+    client = StubClient(found={'orderId': 9, 'status': 'FILLED'})
+
+    assert ws_trade.create_order(client, **MARKET)['orderId'] == 9
+    assert client.names() == ['get']
+
+def test_create_order_unknown_outcome_is_not_resent(use_ws, monkeypatch):
+    monkeypatch.setattr(ws_trade, 'WS_TIMEOUT_SECONDS', 0.01)
+    use_ws(FakeWSClient(['unanswered']))
+    client = StubClient(lookup_error=api_error(-1001))
+
+    with pytest.raises(BinanceAPIException):
+        ws_trade.create_order(client, **MARKET)
+    assert client.names() == ['get']
+
+def test_create_order_duplicate_client_id_is_looked_up(use_ws):
+    use_ws(FakeWSClient(['unsent']))
+    client = StubClient(found={'orderId': 3, 'status': 'NEW'},
+                        create_error=api_error(ws_trade.DUPLICATE_CLIENT_ORDER_ID))
+
+    assert ws_trade.create_order(client, **MARKET)['orderId'] == 3
+    assert client.names() == ['create', 'get']
+
+def test_create_orders_keeps_request_order(use_ws, monkeypatch):
+    monkeypatch.setattr(ws_trade, 'WS_TIMEOUT_SECONDS', 0.01)
+    ws = use_ws(FakeWSClient([
+        {'orderId': 100, 'status': 'FILLED'},      # 0: answered over WebSocket
+        BinanceOrderError(-2019, "Margin"),        # 1: rejected over WebSocket
+        'unanswered',                              # 2: looked up, missing, resent
+        'unsent',                                  # 3: never sent (and 4 with it)
+    ]))
+
+    def batch(orders):
+        # REST rejects the last order; everything else is placed
+        return [
+            {'code': -1111, 'msg': "Precision"} if order['quantity'] == '0.05'
+            else {'orderId': 200 + index, 'clientOrderId': order['newClientOrderId']}
+            for index, order in enumerate(orders)
+        ]
+
+    client = StubClient(batch_response=batch)
+    orders = [dict(MARKET, quantity=f"0.0{n}") for n in range(1, 6)]
+
+    results = ws_trade.create_orders(client, orders)
+
+    assert results[0]['orderId'] == 100
+    assert isinstance(results[1], BinanceOrderError)
+    assert [results[2]['orderId'], results[3]['orderId']] == [200, 201]
+    assert isinstance(results[4], BinanceOrderError) and results[4].code == -1111
+    assert client.names() == ['get', 'batch']
+    assert ws.resets == 1
+    # The resent order keeps the client order id it was first sent with
+    assert results[2]['clientOrderId'] == ws.sent[2]['newClientOrderId']